@@ -1,28 +1,68 @@
 import streamlit as st
-import pandas as pd
 import os
 from pathlib import Path
-from PIL import Image
-import pyvips
 import io
 import json
 import time
+import tarfile
+import zipfile
+import uuid
 from datetime import datetime
+from concurrent.futures.process import BrokenProcessPool
+
+RUN_STARTED = time.perf_counter()  # Start of this script run, used to measure session startup
 from config import (
     DEFAULT_IMAGES_PER_PAGE, 
     PAGE_OVERLAP,
     THUMBNAIL_SIZE, 
+    THUMBNAIL_CACHE_ENTRIES,
+    VIEWER_MODES,
+    DEFAULT_VIEWER_MODE,
+    HYBRID_MAX_VIEWERS,
+    HYBRID_IDLE_SECONDS,
+    HYBRID_HOVER_DELAY_MS,
     SUPPORTED_EXTENSIONS,
-    DEFAULT_EXCLUSION_REASONS
+    SUPPORTED_ARCHIVE_EXTENSIONS,
+    DEFAULT_EXCLUSION_REASONS,
+    REVIEW_DB_PATH,
+    SHARED_SYNC_INTERVAL,
+    USE_CLIENT_GRID,
+    GRID_DEBOUNCE_MS,
+    TRIAGE_PREFETCH,
+    TRIAGE_WINDOW,
+    TRIAGE_VIEWER_HEIGHT,
+    VALIDATION_CACHE_PATH,
+    MIN_PYRAMID_LEVELS,
+    INVALID_FILE_REASON,
+    WARM_CACHE_MB
+)
+from image_index import ImageIndex, ExclusionSet
+from review_store import ReviewStore
+from review_grid import review_grid
+from triage import triage_view
+from server_client import request_prefetch
+from archive_index import list_archive_images, open_image, open_vips_image, resolve_image, image_name, image_stem
+from validation import ValidationCache, validate_images
+from export import (
+    EXPORT_COLUMNS,
+    DIMENSION_COLUMNS,
+    EXPORT_FORMATS,
+    available_export_formats,
+    iter_export_rows,
+    build_export,
+    read_image_dimensions,
+    read_score_table
 )
 
-# Simple server configuration
-SERVER_PORT = 5000
-SERVER_URL = f"http://127.0.0.1:{SERVER_PORT}"
+# File server configuration: an external server can be used by setting its URL in this variable,
+# otherwise the app starts one in-process on a free port
+SERVER_URL_ENV = "IMAGE_EXCLUDER_SERVER_URL"
 
 # Backup configuration
 BACKUP_DIR = Path("backups")
 AUTO_BACKUP_INTERVAL = 300  # 5 minutes in seconds
+BACKUP_LIST_SIZE = 5  # Backups shown in the sidebar
+BACKUP_FORMAT_VERSION = 2  # 2: compact image index and id-based exclusions
 
 # Configure page
 st.set_page_config(
@@ -46,39 +86,79 @@ def save_backup(filename=None):
             filename = f"session_backup_{timestamp}.json"
         
         backup_data = {
+            "format_version": BACKUP_FORMAT_VERSION,
             "timestamp": datetime.now().isoformat(),
-            "excluded_images": st.session_state.excluded_images,
+            "excluded_images": st.session_state.excluded_images.to_dict(),
             "current_page": st.session_state.current_page,
             "images_per_page": st.session_state.images_per_page,
-            "image_files": st.session_state.image_files,
+            "image_index": st.session_state.image_files.to_dict(),
             "exclusion_reasons": st.session_state.exclusion_reasons,
-            "use_thumbnail_view": st.session_state.use_thumbnail_view,
+            "viewer_mode": st.session_state.viewer_mode,
+            "use_thumbnail_view": st.session_state.viewer_mode == "thumbnail",  # Read by older versions
             "total_images": len(st.session_state.image_files),
             "excluded_count": len(st.session_state.excluded_images)
         }
         
         backup_path = BACKUP_DIR / filename
         with open(backup_path, 'w') as f:
-            json.dump(backup_data, f, indent=2, ensure_ascii=False)
+            json.dump(backup_data, f, ensure_ascii=False, separators=(',', ':'))
         
         return backup_path
     except Exception as e:
         st.error(f"Failed to save backup: {e}")
         return None
 
+@st.cache_data(show_spinner=False, max_entries=BACKUP_LIST_SIZE)
+def read_backup(backup_path: str, mtime_ns: int) -> dict:
+    """Parse a backup file once per process; the mtime is part of the cache key"""
+    with open(backup_path, 'r') as f:
+        return json.load(f)
+
+@st.cache_data(show_spinner=False, max_entries=4 * BACKUP_LIST_SIZE)
+def read_backup_summary(backup_path: str, mtime_ns: int) -> dict:
+    """Return the timestamp and counts shown in the backup list"""
+    backup_data = read_backup(backup_path, mtime_ns)
+    return {
+        "timestamp": backup_data["timestamp"],
+        "excluded_count": backup_data.get("excluded_count", 0),
+        "total_images": backup_data.get("total_images", 0),
+    }
+
 def load_backup(backup_path):
     """Load session state from a backup file"""
     try:
-        with open(backup_path, 'r') as f:
-            backup_data = json.load(f)
+        backup_data = read_backup(str(backup_path), os.stat(backup_path).st_mtime_ns)
+        
+        exclusion_reasons = backup_data.get("exclusion_reasons", DEFAULT_EXCLUSION_REASONS.copy())
+        
+        if "image_index" in backup_data:
+            image_index = ImageIndex.from_dict(backup_data["image_index"])
+            excluded_images = ExclusionSet.from_dict(backup_data.get("excluded_images", {}))
+        else:
+            # Version 1 backups store full paths and a {filepath: reason} dict
+            image_index = ImageIndex(backup_data.get("image_files", []))
+            excluded_images = ExclusionSet(len(image_index))
+            for filepath, reason in backup_data.get("excluded_images", {}).items():
+                image_id = image_index.index_of(filepath)
+                if image_id is None:
+                    continue
+                if reason not in exclusion_reasons:
+                    exclusion_reasons.append(reason)
+                excluded_images.exclude(image_id, exclusion_reasons.index(reason))
         
         # Restore session state
-        st.session_state.excluded_images = backup_data.get("excluded_images", {})
+        st.session_state.excluded_images = excluded_images
         st.session_state.current_page = backup_data.get("current_page", 0)
         st.session_state.images_per_page = backup_data.get("images_per_page", DEFAULT_IMAGES_PER_PAGE)
-        st.session_state.image_files = backup_data.get("image_files", [])
-        st.session_state.exclusion_reasons = backup_data.get("exclusion_reasons", DEFAULT_EXCLUSION_REASONS.copy())
-        st.session_state.use_thumbnail_view = backup_data.get("use_thumbnail_view", False)
+        st.session_state.image_files = image_index
+        st.session_state.exclusion_reasons = exclusion_reasons
+        # Backups from before viewer modes only record whether thumbnails were used
+        if backup_data.get("viewer_mode") in VIEWER_MODES:
+            st.session_state.viewer_mode = backup_data["viewer_mode"]
+        elif backup_data.get("use_thumbnail_view"):
+            st.session_state.viewer_mode = "thumbnail"
+        else:
+            st.session_state.viewer_mode = DEFAULT_VIEWER_MODE
         
         return True
     except Exception as e:
@@ -110,25 +190,35 @@ def auto_backup():
             with st.sidebar:
                 st.success(f"🔄 Auto-backup saved: {backup_path.name}")
 
-def load_latest_backup_on_startup():
-    """Load the most recent backup on startup"""
-    if 'backup_loaded_on_startup' not in st.session_state:
-        backup_files = get_backup_files()
-        if backup_files and not st.session_state.excluded_images:  # Only auto-load if no current data
-            latest_backup = backup_files[0]
-            if load_backup(latest_backup):
-                st.success(f"🔄 Auto-restored from backup: {latest_backup.name}")
-        st.session_state.backup_loaded_on_startup = True
+@st.cache_resource(show_spinner="Starting file server...")
+def start_file_server():
+    """Start the TIFF file server in this process once and share it across sessions"""
+    from server import BackgroundServer
+    return BackgroundServer(warm_cache_mb=WARM_CACHE_MB).start()
 
+def get_server_url() -> str:
+    """Base URL of the TIFF file server"""
+    external_url = os.environ.get(SERVER_URL_ENV)
+    if external_url:
+        return external_url.rstrip("/")
+    return start_file_server().url
 
+def get_file_url(image_path):
+    """URL of an image on the separate FastAPI server"""
+    # Encode the file path for URL safety
+    encoded_path = image_path.replace('/', '__SLASH__')
+    return f"{get_server_url()}/{encoded_path}"
+
+def get_thumbnail_url(image_path, size=THUMBNAIL_SIZE[0]):
+    """URL of a server-rendered JPEG thumbnail of an image"""
+    encoded_path = image_path.replace('/', '__SLASH__')
+    return f"{get_server_url()}/thumbnail/{encoded_path}?size={size}"
 
 def create_openseadragon_geotiff_viewer(image_path, container_id, height=350):
     """Create OpenSeadragon viewer with GeoTIFFTileSource plugin using HTTP URL"""
     
     # Use HTTP URL served by the separate FastAPI server
-    # Encode the file path for URL safety
-    encoded_path = image_path.replace('/', '__SLASH__')
-    tiff_url = f"{SERVER_URL}/{encoded_path}"
+    tiff_url = get_file_url(image_path)
     
     viewer_html = f"""
     <div id="{container_id}" style="width: 100%; height: {height}px; border: 2px solid #ddd; border-radius: 8px; background: #f8f9fa;"></div>
@@ -220,8 +310,10 @@ def create_openseadragon_geotiff_viewer(image_path, container_id, height=350):
 
 def create_thumbnail(image_path):
     """Create a simple thumbnail for fallback display"""
+    from PIL import Image
+    
     try:
-        with Image.open(image_path) as img:
+        with open_image(image_path) as f, Image.open(f) as img:
             # For pyramid TIFFs, try to get a smaller level
             if hasattr(img, 'n_frames') and img.n_frames > 1:
                 img.seek(min(img.n_frames - 1, 3))  # Use a smaller level
@@ -246,29 +338,31 @@ def create_thumbnail(image_path):
 
 def create_pyvips_thumbnail(image_path, max_size=800):
     """Create a thumbnail using pyvips for better handling of pyramid TIFFs"""
+    from PIL import Image
+    
     try:
-        # Load image with pyvips
-        image = pyvips.Image.new_from_file(image_path, access='sequential')
-        max_page = image.get_n_pages() - 4
-        image = pyvips.Image.new_from_file(image_path, access='sequential', page=max_page)
+        # Load image with pyvips; the image reads archive members lazily, so finish inside the with blocks
+        with open_vips_image(image_path, access='sequential') as image:
+            max_page = image.get_n_pages() - 4
+        with open_vips_image(image_path, access='sequential', page=max_page) as image:
         
-        # Calculate scaling factor to fit within max_size while maintaining aspect ratio
-        scale = min(max_size / image.width, max_size / image.height)
+            # Calculate scaling factor to fit within max_size while maintaining aspect ratio
+            scale = min(max_size / image.width, max_size / image.height)
         
-        if scale < 1.0:
-            # Resize the image
-            thumbnail = image.resize(scale)
-        else:
-            thumbnail = image
+            if scale < 1.0:
+                # Resize the image
+                thumbnail = image.resize(scale)
+            else:
+                thumbnail = image
         
-        # Convert to RGB if needed and export as JPEG for display
-        if thumbnail.bands == 4:  # RGBA
-            thumbnail = thumbnail.flatten(background=[255, 255, 255])
-        elif thumbnail.bands == 1:  # Grayscale
-            thumbnail = thumbnail.colourspace('srgb')
+            # Convert to RGB if needed and export as JPEG for display
+            if thumbnail.bands == 4:  # RGBA
+                thumbnail = thumbnail.flatten(background=[255, 255, 255])
+            elif thumbnail.bands == 1:  # Grayscale
+                thumbnail = thumbnail.colourspace('srgb')
         
-        # Convert to PIL Image for Streamlit
-        buffer = thumbnail.jpegsave_buffer(Q=85)
+            # Convert to PIL Image for Streamlit
+            buffer = thumbnail.jpegsave_buffer(Q=85)
         return Image.open(io.BytesIO(buffer))
         
     except Exception as e:
@@ -276,6 +370,22 @@ def create_pyvips_thumbnail(image_path, max_size=800):
         # Fallback to PIL thumbnail
         return create_thumbnail(image_path)
 
+@st.cache_data(show_spinner=False, max_entries=THUMBNAIL_CACHE_ENTRIES)
+def get_cached_thumbnail(image_path: str, mtime_ns: int, use_pyvips: bool):
+    """Thumbnail shared by all sessions; the mtime is part of the cache key so changed files are redone"""
+    if use_pyvips:
+        return create_pyvips_thumbnail(image_path)
+    return create_thumbnail(image_path)
+
+def get_thumbnail(image_path: str, use_pyvips: bool = True):
+    """Return a cached pyvips or PIL thumbnail for an image"""
+    try:
+        mtime_ns = resolve_image(image_path)[3]
+    except OSError as e:
+        st.error(f"Error creating thumbnail for {image_path}: {e}")
+        return None
+    return get_cached_thumbnail(image_path, mtime_ns, use_pyvips)
+
 def load_image_files(directory: str) -> list:
     """Load all supported image files from the directory."""
     if not directory or not os.path.exists(directory):
@@ -284,42 +394,334 @@ def load_image_files(directory: str) -> list:
     image_files = []
     for ext in SUPPORTED_EXTENSIONS:
         pattern = f"*{ext}"
-        image_files.extend(Path(directory).glob(pattern))
+        image_files.extend(str(f) for f in Path(directory).glob(pattern))
+    
+    # Images inside shard archives are listed from the archive's offset index
+    for ext in SUPPORTED_ARCHIVE_EXTENSIONS:
+        for archive in Path(directory).glob(f"*{ext}"):
+            try:
+                image_files.extend(list_archive_images(str(archive), SUPPORTED_EXTENSIONS))
+            except (OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+                st.warning(f"⚠️ Could not index archive {archive.name}: {e}")
+    
+    return sorted(image_files)
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_image_index(directory: str, directory_mtime: int) -> ImageIndex:
+    """Build the read-only image index for a directory once and share it across sessions.
+    
+    The directory mtime is part of the cache key so adding or removing files triggers a rescan;
+    only the latest index is kept so rescans do not pile up stale indexes.
+    """
+    return ImageIndex(load_image_files(directory))
+
+def set_image_index(image_index: ImageIndex):
+    """Switch the session to a new image index, carrying exclusions over by path"""
+    old_index = st.session_state.image_files
+    old_exclusions = st.session_state.excluded_images
+    
+    excluded_images = ExclusionSet(len(image_index))
+    for image_id, reason_code in old_exclusions.items():
+        new_id = image_index.index_of(old_index[image_id])
+        if new_id is not None:
+            excluded_images.exclude(new_id, reason_code)
+    
+    # Exclusions for images outside the new index cannot be kept, so back them up first
+    if len(excluded_images) < len(old_exclusions):
+        save_backup()
+    
+    st.session_state.image_files = image_index
+    st.session_state.excluded_images = excluded_images
+
+@st.cache_resource(show_spinner=False)
+def get_validation_cache() -> ValidationCache:
+    """Open the validation result cache once per process"""
+    return ValidationCache(VALIDATION_CACHE_PATH)
+
+def validate_loaded_images(invalid_action: str):
+    """Check the structure of every loaded image and flag or hide the invalid ones"""
+    image_index = st.session_state.image_files
+    progress_bar = st.progress(0.0, text="🩺 Validating images...")
+    
+    def progress(done, total):
+        progress_bar.progress(done / total if total else 1.0, text=f"🩺 Validating images... {done}/{total}")
+    
+    try:
+        results = validate_images(list(image_index), get_validation_cache(), MIN_PYRAMID_LEVELS, progress=progress)
+    except (BrokenProcessPool, OSError) as e:
+        st.error(f"❌ Validation failed: {e}")
+        return
+    finally:
+        progress_bar.empty()
+    invalid = {path: result["problems"] for path, result in results.items() if result["problems"]}
+    st.session_state.validation_issues = invalid
+    if not invalid:
+        return
+    
+    if invalid_action == "Hide from review":
+        set_image_index(ImageIndex([path for path in image_index if path not in invalid]))
+        st.session_state.current_page = 0
+        st.session_state.triage_position = 0
+    elif invalid_action == "Exclude with reason":
+        if INVALID_FILE_REASON not in st.session_state.exclusion_reasons:
+            st.session_state.exclusion_reasons.append(INVALID_FILE_REASON)
+        exclude_images([image_index.index_of(path) for path in invalid], INVALID_FILE_REASON)
+
+def get_exclusion_reason(image_id: int):
+    """Return the exclusion reason of an image, or None if it is included"""
+    reason_code = st.session_state.excluded_images.reason_code(image_id)
+    if reason_code is None:
+        return None
+    return st.session_state.exclusion_reasons[reason_code]
+
+def exclude_images(image_ids, reason: str):
+    """Exclude images with one of the session's exclusion reasons"""
+    reason_code = st.session_state.exclusion_reasons.index(reason)
+    for image_id in image_ids:
+        st.session_state.excluded_images.exclude(image_id, reason_code)
+    publish_changes([(st.session_state.image_files[image_id], reason) for image_id in image_ids])
+
+def include_images(image_ids):
+    """Include previously excluded images again"""
+    for image_id in image_ids:
+        st.session_state.excluded_images.include(image_id)
+    publish_changes([(st.session_state.image_files[image_id], None) for image_id in image_ids])
+
+def exclude_image(image_id: int, reason: str):
+    """Exclude a single image with one of the session's exclusion reasons"""
+    exclude_images([image_id], reason)
+
+def include_image(image_id: int):
+    """Include a single previously excluded image again"""
+    include_images([image_id])
+
+def get_total_pages(total_images: int, images_per_page: int, overlap: int = PAGE_OVERLAP) -> int:
+    """Calculate the number of pages when consecutive pages overlap"""
+    # Each page shows images_per_page images, but we advance by (images_per_page - overlap) each time
+    step_size = get_step_size(images_per_page, overlap)
+    if total_images <= images_per_page:
+        return 1
+    remaining_after_first = total_images - images_per_page
+    return 1 + ((remaining_after_first + step_size - 1) // step_size)
+
+def get_step_size(images_per_page: int, overlap: int = PAGE_OVERLAP) -> int:
+    """Number of images between the first images of consecutive pages"""
+    step_size = images_per_page - overlap
+    if step_size <= 0:
+        step_size = images_per_page  # Fallback if overlap is too large
+    return step_size
+
+def get_page_bounds(page: int, total_images: int, images_per_page: int, overlap: int = PAGE_OVERLAP):
+    """Return the (start_idx, end_idx) image range shown on a page"""
+    # Pages after the first advance by step_size but may overlap
+    start_idx = page * get_step_size(images_per_page, overlap)
+    end_idx = min(start_idx + images_per_page, total_images)
+    return start_idx, end_idx
+
+def warm_next_page(current_page: int, total_images: int, images_per_page: int, overlap: int = PAGE_OVERLAP):
+    """Tell the server which slides the next page will open so it can warm them in the background"""
+    total_pages = get_total_pages(total_images, images_per_page, overlap)
+    if is_shared_review():
+        # The next page is the one the store hands out after this one, not the following page number
+        next_page = get_review_store().next_free_page(st.session_state.cohort, total_pages, skip={current_page})
+        if next_page is None:
+            return
+    else:
+        next_page = current_page + 1
+        if next_page >= total_pages:
+            return
+    
+    image_index = st.session_state.image_files
+    warm_key = (id(image_index), next_page, images_per_page)
+    if st.session_state.warmed_page == warm_key:
+        return  # Already announced on an earlier rerun
+    st.session_state.warmed_page = warm_key
+    
+    start_idx, end_idx = get_page_bounds(next_page, total_images, images_per_page, overlap)
+    request_prefetch(get_server_url(), image_index[start_idx:end_idx])
+
+@st.cache_resource(show_spinner=False)
+def get_review_store() -> ReviewStore:
+    """Open the shared review database once per process"""
+    return ReviewStore(REVIEW_DB_PATH)
+
+def is_shared_review() -> bool:
+    """Check whether this session takes part in a shared review"""
+    return bool(st.session_state.shared_review and st.session_state.cohort and st.session_state.reviewer_name)
+
+def publish_changes(changes):
+    """Send (path, reason) changes to the shared review store when shared review is on"""
+    if not is_shared_review():
+        return
+    get_review_store().apply_changes(
+        st.session_state.cohort, st.session_state.reviewer_name, changes, session=st.session_state.session_id
+    )
+
+def apply_remote_changes(changes):
+    """Apply (path, reason) changes from other reviewers to the local exclusions"""
+    image_index = st.session_state.image_files
+    reasons = st.session_state.exclusion_reasons
+    changed_ids = set()
+    for path, reason in changes:
+        image_id = image_index.index_of(path)
+        if image_id is None:
+            continue
+        if reason is None:
+            st.session_state.excluded_images.include(image_id)
+        else:
+            if reason not in reasons:
+                reasons.append(reason)
+            st.session_state.excluded_images.exclude(image_id, reasons.index(reason))
+        changed_ids.add(image_id)
+    return changed_ids
+
+def join_shared_review():
+    """Merge this session's exclusions into the cohort's shared exclusions and load the result.
+
+    Local exclusions of images the store does not exclude yet are pushed first; where both
+    exclude an image, the store's reason is kept.
+    """
+    store = get_review_store()
+    cohort = st.session_state.cohort
+    reviewer = st.session_state.reviewer_name
+    image_index = st.session_state.image_files
+    reasons = st.session_state.exclusion_reasons
+    
+    exclusions, _ = store.load_exclusions(cohort)
+    local_changes = [
+        (image_index[image_id], reasons[reason_code])
+        for image_id, reason_code in st.session_state.excluded_images.items()
+        if image_index[image_id] not in exclusions
+    ]
+    if local_changes:
+        store.apply_changes(cohort, reviewer, local_changes, session=st.session_state.session_id)
+        if exclusions:
+            st.toast(f"👥 Added {len(local_changes)} of your exclusions to the shared review")
+    
+    exclusions, last_seq = store.load_exclusions(cohort)
+    st.session_state.excluded_images = ExclusionSet(len(image_index))
+    apply_remote_changes(exclusions.items())
+    st.session_state.shared_seq = last_seq
+    st.session_state.leased_page = None
+    st.session_state.joined_review = (cohort, reviewer)
+
+@st.fragment(run_every=SHARED_SYNC_INTERVAL)
+def sync_shared_review(current_ids, total_pages):
+    """Pull other sessions' changes, renew the page lease and show team progress"""
+    store = get_review_store()
+    changes = store.changes_since(
+        st.session_state.cohort, st.session_state.shared_seq, exclude_session=st.session_state.session_id
+    )
+    if st.session_state.leased_page is not None and not store.renew_lease(
+        st.session_state.cohort, st.session_state.reviewer_name, st.session_state.leased_page
+    ):
+        # The lease expired and the page went to someone else: get a new page
+        st.session_state.leased_page = None
+        st.toast("⏰ Your page lease expired, moving to a free page")
+        st.rerun()
     
-    return sorted([str(f) for f in image_files])
+    progress = store.progress(st.session_state.cohort)
+    reviewers = ", ".join(progress["active_reviewers"]) or "nobody"
+    st.caption(f"👥 Reviewing now: {reviewers} | ✅ {progress['completed_pages']}/{total_pages} pages done")
+    
+    if changes:
+        st.session_state.shared_seq = changes[-1][0]
+        changed_ids = apply_remote_changes((path, reason) for _, path, reason, _ in changes)
+        # Redraw the page only if another reviewer touched one of its images
+        if any(image_id in current_ids for image_id in changed_ids):
+            st.rerun()
+
+def remove_export_file(export_path):
+    """Delete a prepared export that has been replaced"""
+    try:
+        os.remove(export_path)
+    except OSError:
+        pass
 
 def export_excluded_images():
-    """Export excluded images to CSV."""
+    """Export excluded images to CSV or Parquet, built only when requested."""
     if not st.session_state.excluded_images:
         st.warning("No excluded images to export.")
         return
     
-    # Create DataFrame
-    data = []
-    for filepath, reason in st.session_state.excluded_images.items():
-        stem = Path(filepath).stem
-        data.append({"image_stem": stem, "exclusion_reason": reason, "full_path": filepath})
+    export_format = st.radio(
+        "Export format",
+        available_export_formats(),
+        horizontal=True,
+        help="Install the parquet extra (pyarrow) for Parquet export"
+    )
+    include_dimensions = st.checkbox("Include image dimensions", help="Reads each excluded image's header")
+    scores_file = st.file_uploader(
+        "Scores CSV (optional)",
+        type="csv",
+        help="Extra columns joined on an 'image_stem' column"
+    )
     
-    df = pd.DataFrame(data)
+    columns = list(EXPORT_COLUMNS)
+    scores = {}
+    if include_dimensions:
+        columns += DIMENSION_COLUMNS
+    if scores_file is not None:
+        try:
+            scores, score_columns = read_score_table(scores_file)
+            columns += [c for c in score_columns if c not in columns]
+        except ValueError as e:
+            st.error(f"❌ {e}")
     
-    # Convert to CSV
-    csv = df.to_csv(index=False)
+    def metadata(filepath):
+        values = dict(scores.get(image_stem(filepath), {}))
+        if include_dimensions:
+            values.update(read_image_dimensions(filepath))
+        return values
     
-    # Create download button
-    st.download_button(
-        label="📥 Download Excluded Images CSV",
-        data=csv,
-        file_name=f"excluded_images_{int(time.time())}.csv",
-        mime="text/csv",
-        type="primary"
+    # The export is only rebuilt when the exclusions or export options changed
+    excluded_images = st.session_state.excluded_images
+    export_key = (
+        id(excluded_images),
+        excluded_images.version,
+        len(st.session_state.exclusion_reasons),
+        export_format,
+        tuple(columns),
+        scores_file.file_id if scores_file is not None else None
     )
+    cached_export = st.session_state.get("export_cache")
+    
+    if cached_export is None or cached_export[0] != export_key or not os.path.exists(cached_export[1]):
+        if st.button("📦 Prepare Export"):
+            with st.spinner("Building export..."):
+                rows = iter_export_rows(
+                    st.session_state.image_files,
+                    excluded_images,
+                    st.session_state.exclusion_reasons,
+                    metadata if len(columns) > len(EXPORT_COLUMNS) else None
+                )
+                # Dimensions are the only generated integer columns; score columns stay text
+                export_path = build_export(
+                    rows, columns, export_format, DIMENSION_COLUMNS if include_dimensions else ()
+                )
+            if cached_export is not None:
+                remove_export_file(cached_export[1])
+            st.session_state.export_cache = (export_key, export_path)
+            cached_export = st.session_state.export_cache
+        else:
+            return
+    
+    extension, mime = EXPORT_FORMATS[export_format]
+    with open(cached_export[1], 'rb') as export_file:
+        st.download_button(
+            label=f"📥 Download Excluded Images {export_format}",
+            data=export_file,
+            file_name=f"excluded_images_{int(time.time())}.{extension}",
+            mime=mime,
+            type="primary",
+            on_click="ignore"
+        )
 
-@st.fragment
 def render_batch_operations(current_images):
-    """Render batch operations section - using fragment for performance"""
+    """Render batch operations section for the current page"""
     # Get images on current page that are not excluded
-    non_excluded_current = [img for img in current_images if img not in st.session_state.excluded_images]
-    excluded_current = [img for img in current_images if img in st.session_state.excluded_images]
+    non_excluded_current = [i for i in current_images.ids if i not in st.session_state.excluded_images]
+    excluded_current = [i for i in current_images.ids if i in st.session_state.excluded_images]
     
     # Batch exclusion controls
     st.markdown("---")
@@ -339,8 +741,7 @@ def render_batch_operations(current_images):
                         type="primary", 
                         disabled=(batch_reason == "Select reason...")):
                 if batch_reason != "Select reason...":
-                    for image_path in non_excluded_current:
-                        st.session_state.excluded_images[image_path] = batch_reason
+                    exclude_images(non_excluded_current, batch_reason)
                     
                     # Trigger backup after batch operation
                     save_backup()
@@ -354,8 +755,7 @@ def render_batch_operations(current_images):
         if excluded_current:
             if st.button(f"✅ Include All {len(excluded_current)} Images on Page", 
                         type="secondary"):
-                for image_path in excluded_current:
-                    del st.session_state.excluded_images[image_path]
+                include_images(excluded_current)
                 
                 # Trigger backup after batch operation
                 save_backup()
@@ -374,25 +774,34 @@ def render_batch_operations(current_images):
     st.markdown("---")
 
 @st.fragment
-def render_image_card(image_path, image_name, container_id, cols_per_row):
+def render_image_card(image_id, image_path, image_name, container_id, cols_per_row):
     """Render a single image card with exclusion controls - using fragment for performance"""
     # Image header
-    is_excluded = image_path in st.session_state.excluded_images
+    is_excluded = image_id in st.session_state.excluded_images
     
     if is_excluded:
         st.markdown(f"**🚫 {image_name}**")
-        st.error(f"Excluded: {st.session_state.excluded_images[image_path]}")
+        st.error(f"Excluded: {get_exclusion_reason(image_id)}")
     else:
         st.markdown(f"**✅ {image_name}**")
     
     # Display image based on selected viewer type
-    if st.session_state.use_thumbnail_view:
+    viewer_mode = st.session_state.viewer_mode
+    open_viewers = st.session_state.open_viewers
+    if viewer_mode == "thumbnail" or (viewer_mode == "hybrid" and image_id not in open_viewers):
         # Use pyvips thumbnail view
-        thumbnail = create_pyvips_thumbnail(image_path)
+        thumbnail = get_thumbnail(image_path)
         if thumbnail:
             st.image(thumbnail, caption=image_name, use_container_width=True)
         else:
             st.error("Failed to load image thumbnail")
+        if viewer_mode == "hybrid" and st.button("🔍 Zoom", key=f"zoom_{image_path}"):
+            open_viewers.append(image_id)
+            if len(open_viewers) > HYBRID_MAX_VIEWERS:
+                # Close the oldest viewer; its card has to rerender to show the thumbnail again
+                del open_viewers[0]
+                st.rerun()
+            st.rerun(scope="fragment")
     else:
         # Use OpenSeadragon viewer with adaptive height based on grid size
         viewer_height = 300 if cols_per_row >= 5 else 400
@@ -400,10 +809,13 @@ def render_image_card(image_path, image_name, container_id, cols_per_row):
             # Always use GeoTIFF tile source for TIFF files
             viewer_html = create_openseadragon_geotiff_viewer(image_path, container_id, viewer_height)
             st.components.v1.html(viewer_html, height=viewer_height + 50)
+            if viewer_mode == "hybrid" and st.button("🖼️ Close viewer", key=f"unzoom_{image_path}"):
+                open_viewers.remove(image_id)
+                st.rerun(scope="fragment")
         except Exception as e:
             st.error(f"Failed to create viewer: {e}")
             # Fallback to thumbnail
-            thumbnail = create_thumbnail(image_path)
+            thumbnail = get_thumbnail(image_path, use_pyvips=False)
             if thumbnail:
                 st.image(thumbnail, caption=image_name, use_container_width=True)
             else:
@@ -412,7 +824,7 @@ def render_image_card(image_path, image_name, container_id, cols_per_row):
     # Exclusion controls
     if is_excluded:
         if st.button("✅ Include", key=f"include_{image_path}", type="secondary"):
-            del st.session_state.excluded_images[image_path]
+            include_image(image_id)
             # Trigger immediate backup on state change
             if len(st.session_state.excluded_images) % 5 == 0:  # Backup every 5 changes
                 save_backup()
@@ -428,37 +840,190 @@ def render_image_card(image_path, image_name, container_id, cols_per_row):
         
         # Automatically exclude when a reason is selected
         if reason != "Select reason...":
-            st.session_state.excluded_images[image_path] = reason
+            exclude_image(image_id, reason)
             # Trigger immediate backup on state change
             if len(st.session_state.excluded_images) % 5 == 0:  # Backup every 5 changes
                 save_backup()
             st.rerun(scope="fragment")
 
-# Initialize session state
-if 'excluded_images' not in st.session_state:
-    st.session_state.excluded_images = {}  # {filepath: reason}
-if 'current_page' not in st.session_state:
-    st.session_state.current_page = 0
-if 'images_per_page' not in st.session_state:
-    st.session_state.images_per_page = DEFAULT_IMAGES_PER_PAGE
-if 'image_files' not in st.session_state:
-    st.session_state.image_files = []
-if 'exclusion_reasons' not in st.session_state:
-    st.session_state.exclusion_reasons = DEFAULT_EXCLUSION_REASONS.copy()
-if 'use_thumbnail_view' not in st.session_state:
-    st.session_state.use_thumbnail_view = False
-if 'last_backup_time' not in st.session_state:
-    st.session_state.last_backup_time = time.time()
-if 'backup_loaded_on_startup' not in st.session_state:
-    st.session_state.backup_loaded_on_startup = False
+def apply_client_changes(component_key, list_key=None):
+    """Apply a batch of toggles sent by a client-side component, once per batch.
+    
+    When list_key is given, batches sent for another image list are ignored. Returns the
+    component value when it was a new batch, else None.
+    """
+    component_value = st.session_state.get(component_key)
+    if not component_value:
+        return None
+    if list_key is not None and component_value.get("list_key") != list_key:
+        return None
+    batch_id = (component_value.get("session"), component_value.get("batch"))
+    if st.session_state.applied_batches.get(component_key) == batch_id:
+        return None
+    st.session_state.applied_batches[component_key] = batch_id
+    
+    image_count = len(st.session_state.image_files)
+    excluded_by_reason = {}
+    included = []
+    for image_id, reason in component_value.get("changes", {}).items():
+        image_id = int(image_id)
+        if not 0 <= image_id < image_count:
+            continue
+        if reason is None:
+            included.append(image_id)
+        elif reason in st.session_state.exclusion_reasons:
+            excluded_by_reason.setdefault(reason, []).append(image_id)
+    
+    for reason, image_ids in excluded_by_reason.items():
+        exclude_images(image_ids, reason)
+    if included:
+        include_images(included)
+    
+    # Backup every 5 changes, as with single card toggles
+    st.session_state.changes_since_backup += len(included) + sum(map(len, excluded_by_reason.values()))
+    if st.session_state.changes_since_backup >= 5:
+        save_backup()
+        st.session_state.changes_since_backup = 0
+    return component_value
+
+def apply_triage_changes(list_key):
+    """Apply the triage view's latest batch and take over its position if it is for the view shown now"""
+    triage_value = apply_client_changes("triage_view", list_key)
+    # A value from before the view was reset (new list or page) must not move the reset position
+    if triage_value is not None and triage_value.get("reset_key") == st.session_state.triage_reset_key:
+        st.session_state.triage_position = triage_value["position"]
+
+def get_card(image_id, image_path):
+    """Describe an image for the client-side components"""
+    return {
+        "id": image_id,
+        "name": st.session_state.image_files.name(image_id),
+        "url": get_file_url(image_path),
+        "thumbnail_url": get_thumbnail_url(image_path),
+        "reason": get_exclusion_reason(image_id),
+    }
+
+@st.fragment
+def render_review_page(current_images, cols_per_row):
+    """Render batch operations and the client-side grid - grid changes only rerun this fragment"""
+    image_index = st.session_state.image_files
+    list_key = str(id(image_index))
+    # Apply the grid's latest batch first so the batch section shows up-to-date counts
+    apply_client_changes("review_grid", list_key)
+    
+    render_batch_operations(current_images)
+    
+    mode = st.session_state.viewer_mode
+    cards = [get_card(image_id, image_path) for image_id, image_path in current_images.items()]
+    
+    page_key = f"{id(image_index)}:{current_images.ids.start}:{current_images.ids.stop}:{mode}:{len(st.session_state.exclusion_reasons)}"
+    review_grid(
+        cards,
+        st.session_state.exclusion_reasons,
+        page_key,
+        list_key,
+        acknowledged=st.session_state.applied_batches.get("review_grid"),
+        mode=mode,
+        columns=cols_per_row,
+        viewer_height=300 if cols_per_row >= 5 else 400,
+        debounce_ms=GRID_DEBOUNCE_MS,
+        max_viewers=HYBRID_MAX_VIEWERS,
+        idle_seconds=HYBRID_IDLE_SECONDS,
+        hover_delay_ms=HYBRID_HOVER_DELAY_MS,
+        key="review_grid"
+    )
+
+@st.fragment
+def render_triage(first_idx, last_idx):
+    """Render the single-image triage view - reviewer actions only rerun this fragment"""
+    image_index = st.session_state.image_files
+    list_key = str(id(image_index))
+    apply_triage_changes(list_key)
+    triage_value = st.session_state.get("triage_view") or {}
+    reset_key = f"{list_key}:{first_idx}:{last_idx}"
+    st.session_state.triage_reset_key = reset_key
+    
+    position = min(max(st.session_state.triage_position, first_idx), last_idx - 1)
+    window_start = max(first_idx, position - TRIAGE_PREFETCH)
+    window_end = min(last_idx, window_start + TRIAGE_WINDOW)
+    items = [get_card(image_id, image_path) for image_id, image_path in image_index[window_start:window_end].items()]
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Position", f"{position - first_idx + 1} / {last_idx - first_idx}")
+    col2.metric("Reviewed in triage", triage_value.get("reviewed", 0))
+    col3.metric("Images per minute", f"{triage_value.get('images_per_minute', 0):.1f}")
+    st.caption("Click the slide, then press a number key to exclude with that reason, 0 to include, → or space for next and ← for previous")
+    
+    triage_view(
+        items,
+        st.session_state.exclusion_reasons,
+        position,
+        first_idx,
+        last_idx,
+        window_start,
+        window_end,
+        reset_key=reset_key,
+        list_key=list_key,
+        acknowledged=st.session_state.applied_batches.get("triage_view"),
+        prefetch=TRIAGE_PREFETCH,
+        viewer_height=TRIAGE_VIEWER_HEIGHT,
+        debounce_ms=GRID_DEBOUNCE_MS,
+        key="triage_view"
+    )
+
+def init_session_state():
+    """Fill in session state defaults once, when a new session starts"""
+    if st.session_state.get('session_initialized'):
+        return
+    
+    defaults = {
+        'excluded_images': ExclusionSet(),  # reason code per image id
+        'current_page': 0,
+        'images_per_page': DEFAULT_IMAGES_PER_PAGE,
+        'image_files': ImageIndex(),
+        'exclusion_reasons': DEFAULT_EXCLUSION_REASONS.copy(),
+        'viewer_mode': DEFAULT_VIEWER_MODE,
+        'open_viewers': [],  # Hybrid mode without the client grid: image ids with a viewer, oldest first
+        'last_backup_time': time.time(),
+        'cohort': None,  # Absolute path of the loaded directory
+        'shared_review': False,
+        'reviewer_name': "",
+        'joined_review': None,  # (cohort, reviewer) currently synced with the store
+        'shared_seq': 0,  # Last change sequence number applied from the store
+        'leased_page': None,
+        'session_id': uuid.uuid4().hex,  # Tags this session's changes in the shared review store
+        'use_client_grid': USE_CLIENT_GRID,
+        'applied_batches': {},  # {component key: (browser session, batch number)} last applied
+        'warmed_page': None,  # (index, page, page size) last announced to the server
+        'triage_mode': False,
+        'triage_position': 0,  # Image id shown in triage mode
+        'triage_reset_key': None,  # Reset key last sent to the triage view
+        'changes_since_backup': 0,
+        'validate_on_load': False,
+        'validation_issues': None,  # {path: problems} of the last validation run
+        'startup_seconds': None,  # Duration of the session's first run
+    }
+    for key, value in defaults.items():
+        if key not in st.session_state:
+            st.session_state[key] = value
+    st.session_state.session_initialized = True
+
+def show_startup_time():
+    """Record how long the session's first run took and show it in the sidebar"""
+    if st.session_state.startup_seconds is None:
+        st.session_state.startup_seconds = time.perf_counter() - RUN_STARTED
+    st.sidebar.caption(f"⏱️ Session started in {st.session_state.startup_seconds:.2f} s")
+
+init_session_state()
 
 # Main app
 def main():
     st.title("🖼️ Image Excluder")
     st.markdown("Select pyramid tiled TIFF images to exclude from your dataset with OpenSeadragon viewer or thumbnail view")
     
-    # Load latest backup on startup
-    load_latest_backup_on_startup()
+    # Apply client-side toggles before anything reads the exclusions
+    apply_client_changes("review_grid", str(id(st.session_state.image_files)))
+    apply_triage_changes(str(id(st.session_state.image_files)))
     
     # Auto backup
     auto_backup()
@@ -473,29 +1038,99 @@ def main():
             help="Enter the path to the directory containing TIFF images"
         )
         
+        st.session_state.validate_on_load = st.toggle(
+            "🩺 Validate on load",
+            value=st.session_state.validate_on_load,
+            help="Check IFD chains, tile bounds and pyramid levels of every TIFF when loading"
+        )
+        invalid_action = st.radio(
+            "Invalid images",
+            ["Exclude with reason", "Hide from review", "Only report"],
+            help=f"Exclude invalid images as '{INVALID_FILE_REASON}', leave them out of the review or just list them"
+        )
+        
         if st.button("🔍 Load Images", type="primary") and directory:
             if os.path.exists(directory):
-                st.session_state.image_files = load_image_files(directory)
+                image_index = get_image_index(directory, os.stat(directory).st_mtime_ns)
+                set_image_index(image_index)
+                st.session_state.cohort = os.path.abspath(directory)
                 st.session_state.current_page = 0
+                st.session_state.triage_position = 0
+                st.session_state.validation_issues = None
                 st.success(f"✅ Loaded {len(st.session_state.image_files)} images")
+                if st.session_state.validate_on_load:
+                    validate_loaded_images(invalid_action)
             else:
                 st.error("❌ Directory not found!")
         
+        if st.session_state.image_files and st.button("🩺 Validate Images", help="Check every TIFF's structure from its headers before reviewing"):
+            validate_loaded_images(invalid_action)
+        
+        if st.session_state.validation_issues is not None:
+            issues = st.session_state.validation_issues
+            if issues:
+                st.warning(f"⚠️ {len(issues)} invalid images")
+                with st.expander("Invalid images"):
+                    for path, problems in list(issues.items())[:50]:
+                        st.write(f"**{image_name(path)}**")
+                        for problem in problems:
+                            st.caption(problem)
+                    if len(issues) > 50:
+                        st.caption(f"... and {len(issues) - 50} more")
+            else:
+                st.success("✅ All images passed validation")
+        
         st.header("⚙️ Settings")
+        page_sizes = [15, 30, 45, 60]
+        # A shared review pages the same way for every reviewer, so the cohort's page size is kept
+        shared_page_size = is_shared_review() and st.session_state.images_per_page in page_sizes
         st.session_state.images_per_page = st.selectbox(
             "Images per page",
-            [15, 30, 45, 60],
-            index=1,
+            page_sizes,
+            index=page_sizes.index(st.session_state.images_per_page) if shared_page_size else 1,
+            disabled=shared_page_size,
             help=f"Number of images to display per page (with {PAGE_OVERLAP} image overlap between pages)"
         )
         
         # Viewer type selection
-        st.session_state.use_thumbnail_view = st.toggle(
-            "🖼️ Use thumbnail view",
-            value=st.session_state.use_thumbnail_view,
-            help="Toggle between OpenSeadragon zoomable viewer and simple thumbnail view"
+        viewer_modes = list(VIEWER_MODES)
+        st.session_state.viewer_mode = st.selectbox(
+            "Viewer",
+            viewer_modes,
+            index=viewer_modes.index(st.session_state.viewer_mode),
+            format_func=VIEWER_MODES.get,
+            help="Hybrid shows thumbnails and opens a zoomable viewer only for the image you hover, click or focus"
+        )
+        
+        st.session_state.use_client_grid = st.toggle(
+            "⚡ Client-side grid",
+            value=st.session_state.use_client_grid,
+            help="Keep include/exclude toggles in the browser and send them in batches instead of rerunning the app on every click"
         )
         
+        st.session_state.triage_mode = st.toggle(
+            "🎯 Triage mode",
+            value=st.session_state.triage_mode,
+            help="Review one slide at a time with hotkeys while the next slides are prefetched"
+        )
+        
+        # Shared review settings
+        st.subheader("👥 Shared Review")
+        st.session_state.reviewer_name = st.text_input(
+            "Reviewer name",
+            value=st.session_state.reviewer_name,
+            help="Unique name shown to other reviewers of the same directory"
+        ).strip()
+        st.session_state.shared_review = st.toggle(
+            "Review together with others",
+            value=st.session_state.shared_review,
+            help="Share exclusions with other sessions and hand out pages so nobody reviews the same page twice"
+        )
+        if st.session_state.shared_review and not st.session_state.reviewer_name:
+            st.warning("⚠️ Enter a reviewer name to join the shared review")
+        if not st.session_state.shared_review:
+            st.session_state.joined_review = None  # Rejoin and resync when turned back on
+        
         # Exclusion reasons management
         st.subheader("📝 Exclusion Reasons")
         
@@ -520,12 +1155,9 @@ def main():
             st.write(f"**Excluded images:** {len(st.session_state.excluded_images)}")
             
             # Show breakdown by reason
-            reason_counts = {}
-            for reason in st.session_state.excluded_images.values():
-                reason_counts[reason] = reason_counts.get(reason, 0) + 1
-            
-            for reason, count in reason_counts.items():
-                st.write(f"• {reason}: {count}")
+            reason_counts = st.session_state.excluded_images.reason_counts()
+            for reason_code, count in reason_counts.items():
+                st.write(f"• {st.session_state.exclusion_reasons[reason_code]}: {count}")
             
             export_excluded_images()
         else:
@@ -556,10 +1188,9 @@ def main():
             st.write("**Available backups:**")
             
             # Show backup info
-            for backup_file in backup_files[:5]:  # Show last 5 backups
+            for backup_file in backup_files[:BACKUP_LIST_SIZE]:
                 try:
-                    with open(backup_file, 'r') as f:
-                        backup_info = json.load(f)
+                    backup_info = read_backup_summary(str(backup_file), backup_file.stat().st_mtime_ns)
                     
                     backup_time = datetime.fromisoformat(backup_info["timestamp"]).strftime("%Y-%m-%d %H:%M")
                     excluded_count = backup_info.get("excluded_count", 0)
@@ -587,28 +1218,50 @@ def main():
         st.info("👈 Please select a directory containing images using the sidebar.")
         return
     
+    shared_review = is_shared_review()
+    if shared_review:
+        # Page leases only line up when every reviewer of the cohort pages the same way through the same list
+        image_index = st.session_state.image_files
+        page_size, image_count, fingerprint = get_review_store().register_cohort(
+            st.session_state.cohort, st.session_state.images_per_page, len(image_index), image_index.fingerprint()
+        )
+        if fingerprint != image_index.fingerprint():
+            st.error(
+                f"❌ Your image list ({len(image_index)} images) is not the one this shared review was started "
+                f"with ({image_count} images). Reload the directory with every image shown, or turn shared review off."
+            )
+            return
+        if st.session_state.joined_review != (st.session_state.cohort, st.session_state.reviewer_name):
+            join_shared_review()
+        if page_size != st.session_state.images_per_page:
+            st.session_state.images_per_page = page_size
+            st.rerun()
+    
     # Pagination controls with overlap
     total_images = len(st.session_state.image_files)
     images_per_page = st.session_state.images_per_page
     overlap = PAGE_OVERLAP
+    total_pages = get_total_pages(total_images, images_per_page, overlap)
     
-    # Calculate total pages with overlap
-    # Each page shows images_per_page images, but we advance by (images_per_page - overlap) each time
-    step_size = images_per_page - overlap
-    if step_size <= 0:
-        step_size = images_per_page  # Fallback if overlap is too large
-    
-    # Calculate how many pages we need
-    if total_images <= images_per_page:
-        total_pages = 1
-    else:
-        remaining_after_first = total_images - images_per_page
-        total_pages = 1 + ((remaining_after_first + step_size - 1) // step_size)
+    if shared_review:
+        # Pages are handed out by the store so reviewers never work on the same page
+        if st.session_state.leased_page is None:
+            st.session_state.leased_page = get_review_store().acquire_page(
+                st.session_state.cohort, st.session_state.reviewer_name, total_pages
+            )
+        if st.session_state.leased_page is None:
+            st.success("🎉 Every page has been reviewed or is being reviewed by someone else.")
+            return
+        st.session_state.current_page = st.session_state.leased_page
     
     col1, col2, col3 = st.columns([1, 2, 1])
     
     with col1:
-        if st.button("⬅️ Previous") and st.session_state.current_page > 0:
+        if shared_review:
+            st.markdown(f"🔒 Page leased to **{st.session_state.reviewer_name}**")
+        elif st.session_state.triage_mode:
+            pass  # Triage moves through all images without pages
+        elif st.button("⬅️ Previous") and st.session_state.current_page > 0:
             st.session_state.current_page -= 1
             st.rerun()
     
@@ -624,80 +1277,40 @@ def main():
             st.markdown(f"💾 Last backup: {backup_time}")
     
     with col3:
-        if st.button("➡️ Next") and st.session_state.current_page < total_pages - 1:
+        if shared_review:
+            if st.button("✅ Page done ➡️ Next", type="primary"):
+                get_review_store().release_page(
+                    st.session_state.cohort, st.session_state.reviewer_name, st.session_state.leased_page, completed=True
+                )
+                st.session_state.leased_page = None
+                st.rerun()
+        elif st.session_state.triage_mode:
+            pass
+        elif st.button("➡️ Next") and st.session_state.current_page < total_pages - 1:
             st.session_state.current_page += 1
             st.rerun()
     
     # Calculate current page images with overlap
-    if st.session_state.current_page == 0:
-        # First page starts at 0
-        start_idx = 0
-    else:
-        # Subsequent pages advance by step_size but may overlap
-        start_idx = st.session_state.current_page * step_size
+    start_idx, end_idx = get_page_bounds(st.session_state.current_page, total_images, images_per_page, overlap)
+    current_images = st.session_state.image_files[start_idx:end_idx]  # view, no copy
     
-    end_idx = min(start_idx + images_per_page, total_images)
-    current_images = st.session_state.image_files[start_idx:end_idx]
+    if not st.session_state.triage_mode:
+        warm_next_page(st.session_state.current_page, total_images, images_per_page, overlap)
+    
+    if shared_review:
+        sync_shared_review(current_images.ids, total_pages)
+    
+    if st.session_state.triage_mode:
+        # Shared reviewers triage their leased page, everyone else the whole list
+        first_idx, last_idx = (start_idx, end_idx) if shared_review else (0, total_images)
+        render_triage(first_idx, last_idx)
+        return
     
     # Show overlap information
     if st.session_state.current_page > 0 and overlap > 0:
         overlapping_images = min(overlap, len(current_images))
         st.info(f"📄 Page {st.session_state.current_page + 1} of {total_pages} | Showing {len(current_images)} images | {overlapping_images} overlap from previous page")
     
-    # Batch exclusion controls
-    st.markdown("---")
-    st.subheader("🔄 Batch Operations for Current Page")
-    
-    # Get images on current page that are not excluded
-    non_excluded_current = [img for img in current_images if img not in st.session_state.excluded_images]
-    excluded_current = [img for img in current_images if img in st.session_state.excluded_images]
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if non_excluded_current:
-            batch_reason = st.selectbox(
-                "Reason for batch exclusion:",
-                ["Select reason..."] + st.session_state.exclusion_reasons,
-                key="batch_exclude_reason"
-            )
-            
-            if st.button(f"🚫 Exclude All {len(non_excluded_current)} Images on Page", 
-                        type="primary", 
-                        disabled=(batch_reason == "Select reason...")):
-                if batch_reason != "Select reason...":
-                    for image_path in non_excluded_current:
-                        st.session_state.excluded_images[image_path] = batch_reason
-                    
-                    # Trigger backup after batch operation
-                    save_backup()
-                    st.success(f"✅ Excluded {len(non_excluded_current)} images with reason: {batch_reason}")
-                    st.rerun()
-        else:
-            st.info("All images on this page are already excluded")
-    
-    with col2:
-        if excluded_current:
-            if st.button(f"✅ Include All {len(excluded_current)} Images on Page", 
-                        type="secondary"):
-                for image_path in excluded_current:
-                    del st.session_state.excluded_images[image_path]
-                
-                # Trigger backup after batch operation
-                save_backup()
-                st.success(f"✅ Included {len(excluded_current)} images back")
-                st.rerun()
-        else:
-            st.info("No excluded images on this page")
-    
-    with col3:
-        st.write("**Page Status:**")
-        st.write(f"📄 Total on page: {len(current_images)}")
-        st.write(f"✅ Included: {len(non_excluded_current)}")
-        st.write(f"🚫 Excluded: {len(excluded_current)}")
-    
-    st.markdown("---")
-    
     # Display images in grid - adaptive layout based on images per page
     if st.session_state.images_per_page <= 15:
         cols_per_row = 3  # 3 columns for smaller counts
@@ -706,18 +1319,26 @@ def main():
     else:
         cols_per_row = 6  # 6 columns for larger counts
     
+    if st.session_state.use_client_grid:
+        render_review_page(current_images, cols_per_row)
+        return
+    
+    render_batch_operations(current_images)
+    
     for i in range(0, len(current_images), cols_per_row):
         cols = st.columns(cols_per_row)
         
         for j, col in enumerate(cols):
             if i + j < len(current_images):
-                image_path = current_images[i + j]
-                image_name = Path(image_path).name
+                image_id = current_images.ids[i + j]
+                image_path = st.session_state.image_files[image_id]
+                display_name = st.session_state.image_files.name(image_id)
                 container_id = f"viewer_{abs(hash(image_path)) % 100000}"
                 
                 with col:
                     # Use fragment to render each image card independently
-                    render_image_card(image_path, image_name, container_id, cols_per_row)
+                    render_image_card(image_id, image_path, display_name, container_id, cols_per_row)
 
 if __name__ == "__main__":
     main()
+    show_startup_time()
@@ -0,0 +1,226 @@
+"""
+Serve slides straight out of tar/zip shard archives through a persisted offset index
+"""
+import io
+import json
+import os
+import tarfile
+import threading
+import zipfile
+from contextlib import contextmanager
+from pathlib import PurePosixPath
+
+ARCHIVE_SEPARATOR = "::"  # Image paths inside archives look like "<archive path>::<member name>"
+INDEX_SUFFIX = ".index.json"
+
+_ZIP_LOCAL_HEADER_SIZE = 30
+
+_index_cache = {}  # (archive path, mtime_ns) -> {member name: (data offset, size)}
+_index_lock = threading.Lock()
+
+
+def split_archive_path(path):
+    """Split an image path into (archive path, member name); member is None for plain files"""
+    archive, sep, member = path.partition(ARCHIVE_SEPARATOR)
+    if not sep:
+        return path, None
+    return archive, member
+
+
+def is_archive_path(path):
+    return ARCHIVE_SEPARATOR in path
+
+
+def image_name(path):
+    """File name of an image path; for archive members the name of the member, not of the archive"""
+    archive, member = split_archive_path(path)
+    return PurePosixPath(member).name if member is not None else os.path.basename(archive)
+
+
+def image_stem(path):
+    """image_name without its extension"""
+    return PurePosixPath(image_name(path)).stem
+
+
+def _index_tar(archive_path):
+    """List (name, data offset, size) of regular members in an uncompressed tar"""
+    with tarfile.open(archive_path, mode='r:') as tar:
+        return [(m.name, m.offset_data, m.size) for m in tar if m.isfile()]
+
+
+def _index_zip(archive_path):
+    """List (name, data offset, size) of stored (uncompressed) members in a zip"""
+    members = []
+    with open(archive_path, 'rb') as f, zipfile.ZipFile(f) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or info.compress_type != zipfile.ZIP_STORED:
+                continue  # Compressed members cannot be served with byte ranges
+            # The local header's name and extra field lengths can differ from the central directory
+            f.seek(info.header_offset)
+            header = f.read(_ZIP_LOCAL_HEADER_SIZE)
+            name_length = int.from_bytes(header[26:28], 'little')
+            extra_length = int.from_bytes(header[28:30], 'little')
+            offset = info.header_offset + _ZIP_LOCAL_HEADER_SIZE + name_length + extra_length
+            members.append((info.filename, offset, info.file_size))
+    return members
+
+
+def build_archive_index(archive_path):
+    """Scan an archive and return [(member name, data offset, size)]"""
+    if archive_path.lower().endswith('.zip'):
+        return _index_zip(archive_path)
+    return _index_tar(archive_path)
+
+
+def load_archive_index(archive_path):
+    """Return {member name: (data offset, size)}, using the sidecar index file when it is current"""
+    stat = os.stat(archive_path)
+    key = (archive_path, stat.st_mtime_ns)
+    with _index_lock:
+        if key in _index_cache:
+            return _index_cache[key]
+
+    index_path = archive_path + INDEX_SUFFIX
+    members = None
+    try:
+        with open(index_path, 'r') as f:
+            saved = json.load(f)
+        if saved.get("archive_size") == stat.st_size and saved.get("archive_mtime_ns") == stat.st_mtime_ns:
+            members = saved["members"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    if members is None:
+        members = build_archive_index(archive_path)
+        try:
+            with open(index_path, 'w') as f:
+                json.dump({
+                    "archive_size": stat.st_size,
+                    "archive_mtime_ns": stat.st_mtime_ns,
+                    "members": members,
+                }, f, separators=(',', ':'))
+        except OSError as e:
+            print(f"Could not save archive index {index_path}: {e}")
+
+    index = {name: (offset, size) for name, offset, size in members}
+    with _index_lock:
+        _index_cache[key] = index
+    return index
+
+
+def list_archive_images(archive_path, extensions):
+    """Return image paths for the archive members with one of the given extensions"""
+    return [
+        f"{archive_path}{ARCHIVE_SEPARATOR}{name}"
+        for name in load_archive_index(archive_path)
+        if name.endswith(tuple(extensions))
+    ]
+
+
+def resolve_image(path):
+    """Return (file on disk, data offset, size, mtime_ns) for an image path"""
+    archive, member = split_archive_path(path)
+    stat = os.stat(archive)
+    if member is None:
+        return path, 0, stat.st_size, stat.st_mtime_ns
+    try:
+        offset, size = load_archive_index(archive)[member]
+    except KeyError:
+        raise FileNotFoundError(f"{member} not found in {archive}") from None
+    return archive, offset, size, stat.st_mtime_ns
+
+
+def image_exists(path):
+    """Check whether an image path points at a file or an indexed archive member"""
+    try:
+        resolve_image(path)
+        return True
+    except (OSError, tarfile.TarError, zipfile.BadZipFile):
+        return False
+
+
+class MemberFile(io.RawIOBase):
+    """Read-only, seekable window onto a byte range of a file"""
+
+    def __init__(self, path, offset, size):
+        self._file = open(path, 'rb')
+        self._offset = offset
+        self._size = size
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def readinto(self, buffer):
+        length = max(0, min(len(buffer), self._size - self._position))
+        if length == 0:
+            return 0
+        self._file.seek(self._offset + self._position)
+        read = self._file.readinto(memoryview(buffer)[:length])
+        self._position += read
+        return read
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_image(path):
+    """Open an image path for binary reading, whether it is a plain file or an archive member"""
+    if not is_archive_path(path):
+        return open(path, 'rb')
+    file_path, offset, size, _ = resolve_image(path)
+    return io.BufferedReader(MemberFile(file_path, offset, size))
+
+
+def _vips_source(member):
+    """pyvips source that reads an open archive member"""
+    import pyvips
+
+    source = pyvips.SourceCustom()
+    source.on_read(lambda size: member.read(size))
+    source.on_seek(lambda offset, whence: member.seek(offset, whence))
+    return source
+
+
+@contextmanager
+def open_vips_image(path, **options):
+    """pyvips.Image.new_from_file that also reads archive members.
+
+    Pixels are read lazily through the archive member, so use the image and any image
+    derived from it inside the with block only.
+    """
+    import pyvips
+
+    if not is_archive_path(path):
+        yield pyvips.Image.new_from_file(path, **options)
+        return
+    with open_image(path) as member:
+        source = _vips_source(member)
+        yield pyvips.Image.new_from_source(source, "", **options)
+
+
+def vips_thumbnail(path, size):
+    """pyvips thumbnail (using pyramid levels where possible) that also reads archive members"""
+    import pyvips
+
+    if not is_archive_path(path):
+        return pyvips.Image.thumbnail(path, size)
+    # The thumbnail does not hold a reference to the custom source, so render it while the source is alive
+    with open_image(path) as member:
+        source = _vips_source(member)
+        return pyvips.Image.thumbnail_source(source, size).copy_memory()
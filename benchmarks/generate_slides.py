@@ -0,0 +1,77 @@
+"""
+Generate synthetic pyramidal tiled TIFFs for benchmarking and testing
+"""
+import argparse
+import math
+from pathlib import Path
+
+COMPRESSIONS = ["jpeg", "deflate", "lzw", "none"]
+
+
+def tile_size_for_levels(width, height, levels):
+    """Smallest tile size (a multiple of 16) for which libvips writes the given number of levels"""
+    # libvips halves the image until it fits in a single tile
+    return max(16, math.ceil(max(width, height) / 2 ** (levels - 1) / 16) * 16)
+
+
+def synthetic_slide(width, height, seed=0):
+    """Tissue-like RGB image: smooth blobs of pink and purple on a white background"""
+    import pyvips
+
+    cell_size = max(32, min(width, height) // 8)
+    bands = [
+        pyvips.Image.perlin(width, height, cell_size=cell_size, seed=seed + band)
+        for band in range(3)
+    ]
+    tissue = bands[0] > 0.05
+    # Perlin noise is in [-1, 1]; stain colours around (220, 160, 200) inside the tissue
+    red = tissue.ifthenelse(bands[1] * 40 + 215, 245)
+    green = tissue.ifthenelse(bands[2] * 50 + 150, 245)
+    blue = tissue.ifthenelse(bands[1] * 30 + 205, 245)
+    return red.bandjoin([green, blue]).cast("uchar").copy(interpretation="srgb")
+
+
+def generate_slide(path, width, height, levels=5, compression="jpeg", tile_size=None, seed=0):
+    """Write one pyramidal tiled TIFF and return its path"""
+    tile_size = tile_size or tile_size_for_levels(width, height, levels)
+    synthetic_slide(width, height, seed).tiffsave(
+        str(path),
+        tile=True,
+        pyramid=True,
+        tile_width=tile_size,
+        tile_height=tile_size,
+        compression=compression,
+        Q=85,
+        bigtiff=width * height * 3 > 2 ** 31,
+    )
+    return path
+
+
+def generate_slides(output_dir, count, width, height, levels=5, compression="jpeg", tile_size=None):
+    """Write count slides named slide_0000.tif, ... into output_dir, skipping ones that exist"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = output_dir / f"slide_{i:04d}.tif"
+        if not path.exists():
+            generate_slide(path, width, height, levels, compression, tile_size, seed=i)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic pyramidal tiled TIFFs")
+    parser.add_argument("output_dir", help="Directory to write the slides to")
+    parser.add_argument("--count", type=int, default=10, help="Number of slides")
+    parser.add_argument("--width", type=int, default=8192, help="Full-resolution width")
+    parser.add_argument("--height", type=int, default=6144, help="Full-resolution height")
+    parser.add_argument("--levels", type=int, default=5, help="Pyramid levels, including full resolution")
+    parser.add_argument("--compression", choices=COMPRESSIONS, default="jpeg")
+    parser.add_argument("--tile-size", type=int, default=None,
+                        help="Tile size; overrides --levels, the pyramid then goes down to a single tile")
+    args = parser.parse_args()
+
+    paths = generate_slides(args.output_dir, args.count, args.width, args.height, args.levels,
+                            args.compression, args.tile_size)
+    print(f"Generated {len(paths)} slides in {args.output_dir}")
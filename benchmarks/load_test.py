@@ -0,0 +1,269 @@
+"""
+Replay GeoTIFFTileSource-style range-request traffic against server.py or file_server.py
+"""
+import argparse
+import http.client
+import json
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from archive_index import open_image, resolve_image  # noqa: E402
+from request_trace import read_trace  # noqa: E402
+from tiff_layout import read_tiff_layout  # noqa: E402
+
+SERVER_TYPES = ["fastapi", "simple"]  # server.py and file_server.py
+BLOCK_SIZE = 64 * 1024  # geotiff.js fetches files in blocks of this size
+VIEWPORT_SIZE = 400  # Pixels of a review grid viewer
+SLIDE_EXTENSIONS = ('.tif', '.tiff', '.TIF', '.TIFF')
+
+
+def file_url_path(path, server_type):
+    """URL path under which each server expects a file path"""
+    if server_type == "fastapi":
+        return "/" + path.replace('/', '__SLASH__')
+    return "/" + quote(path, safe="")  # A leading "//" would be collapsed by http.server
+
+
+def block_requests(spans, fetched):
+    """Range requests for the blocks of the spans not fetched yet, merging consecutive blocks"""
+    blocks = sorted({
+        block
+        for start, end in spans if end > start
+        for block in range(start // BLOCK_SIZE, (end - 1) // BLOCK_SIZE + 1)
+    } - fetched)
+    fetched.update(blocks)
+
+    requests = []
+    for block in blocks:
+        if requests and requests[-1][1] == block:
+            requests[-1][1] = block + 1
+        else:
+            requests.append([block, block + 1])
+    return [(start * BLOCK_SIZE, end * BLOCK_SIZE - 1) for start, end in requests]
+
+
+def tiles_in_view(level, center_x, center_y, viewport):
+    """Tile spans of a level covering a viewport centered on a relative position"""
+    columns = -(-level.width // level.tile_width)
+    rows = -(-level.height // level.tile_height)
+    half_tiles = viewport / 2 / level.tile_width
+    column = int(center_x * columns)
+    row = int(center_y * rows)
+    span = int(half_tiles) + 1
+    spans = []
+    for y in range(max(0, row - span), min(rows, row + span + 1)):
+        for x in range(max(0, column - span), min(columns, column + span + 1)):
+            index = y * columns + x
+            if index < len(level.data_offsets):
+                offset = level.data_offsets[index]
+                spans.append((offset, offset + level.data_byte_counts[index]))
+    return spans
+
+
+def synthesize_session(path, zoom_steps=3, viewport=VIEWPORT_SIZE, rng=random):
+    """Requests of one viewer opening a slide, then zooming in on a random spot a few levels deep.
+
+    Follows what GeoTIFFTileSource does: read the header and IFDs, show the
+    level closest to the viewport size, then fetch the tiles in view on each
+    deeper level. Blocks already fetched are not requested again.
+    """
+    _, _, size, _ = resolve_image(path)
+    with open_image(path) as f:
+        layout = read_tiff_layout(f, size)
+    fetched = set()
+
+    requests = block_requests([(0, BLOCK_SIZE)], fetched)
+    requests += block_requests(layout.header_spans, fetched)
+
+    levels = [level for level in layout.levels if level.is_tiled][::-1]  # Smallest first
+    if not levels:
+        return [(path, start, end) for start, end in requests]
+
+    # Home view: the smallest level at least as large as the viewport, shown whole
+    home = next((i for i, level in enumerate(levels) if max(level.width, level.height) >= viewport),
+                len(levels) - 1)
+    requests += block_requests(levels[home].data_spans, fetched)
+
+    center_x, center_y = rng.random(), rng.random()
+    for level in levels[home + 1:home + 1 + zoom_steps]:
+        requests += block_requests(tiles_in_view(level, center_x, center_y, viewport), fetched)
+        # Reviewers pan a little on every zoom level
+        center_x = min(1.0, max(0.0, center_x + rng.uniform(-0.05, 0.05)))
+        center_y = min(1.0, max(0.0, center_y + rng.uniform(-0.05, 0.05)))
+        requests += block_requests(tiles_in_view(level, center_x, center_y, viewport), fetched)
+
+    return [(path, start, end) for start, end in requests]
+
+
+def find_slides(slides):
+    paths = []
+    for entry in slides:
+        entry = Path(entry)
+        if entry.is_dir():
+            paths.extend(str(p) for p in sorted(entry.iterdir()) if p.name.endswith(SLIDE_EXTENSIONS))
+        else:
+            paths.append(str(entry))
+    return paths
+
+
+def run_session(server_url, server_type, session, timeout):
+    """Issue a viewer's requests one after another over a keep-alive connection"""
+    url = urlsplit(server_url)
+    connection = http.client.HTTPConnection(url.hostname, url.port, timeout=timeout)
+    samples = []
+    for path, start, end in session:
+        headers = {}
+        if start is not None:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+        request_start = time.perf_counter()
+        try:
+            connection.request("GET", file_url_path(path, server_type), headers=headers)
+            response = connection.getresponse()
+            size = len(response.read())
+            ok = response.status < 400
+            if response.will_close:
+                connection.close()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            size, ok = 0, False
+        samples.append((time.perf_counter() - request_start, size, ok))
+    connection.close()
+    return samples
+
+
+def replay(server_url, server_type, sessions, concurrency, timeout=30.0):
+    """Run the viewer sessions with concurrency viewers at a time and summarize the results"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda session: run_session(server_url, server_type, session, timeout),
+                                    sessions))
+    elapsed = time.perf_counter() - start
+
+    samples = [sample for session_samples in results for sample in session_samples]
+    latencies = sorted(latency for latency, _, ok in samples if ok)
+    bytes_served = sum(size for _, size, ok in samples if ok)
+    errors = sum(1 for _, _, ok in samples if not ok)
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+
+    return {
+        "server_url": server_url,
+        "server_type": server_type,
+        "concurrency": concurrency,
+        "sessions": len(sessions),
+        "requests": len(samples),
+        "errors": errors,
+        "elapsed": elapsed,
+        "requests_per_second": len(samples) / elapsed if elapsed else 0,
+        "bytes_served": bytes_served,
+        "megabytes_per_second": bytes_served / elapsed / 1024 / 1024 if elapsed else 0,
+        "latency_p50": percentiles[49] if percentiles else None,
+        "latency_p95": percentiles[94] if percentiles else None,
+        "latency_p99": percentiles[98] if percentiles else None,
+    }
+
+
+def wait_for_port(host, port, process, timeout=10.0):
+    """Wait until a server process accepts connections"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            with socket.create_connection((host, port), timeout=0.2):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def start_server(server_type):
+    """Start server.py or file_server.py on a free port and return (process, url)"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    script = "server.py" if server_type == "fastapi" else "file_server.py"
+    process = subprocess.Popen(
+        [sys.executable, str(REPO_DIR / script), "--port", str(port)],
+        cwd=REPO_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    if not wait_for_port("127.0.0.1", port, process):
+        process.kill()
+        raise RuntimeError(f"{script} did not start")
+    return process, f"http://127.0.0.1:{port}"
+
+
+def print_report(report):
+    print(f"{report['server_type']} @ {report['server_url']}, {report['concurrency']} concurrent viewers")
+    print(f"  {report['sessions']} sessions, {report['requests']} requests, {report['errors']} errors "
+          f"in {report['elapsed']:.2f} s")
+    print(f"  throughput: {report['requests_per_second']:.1f} req/s, {report['megabytes_per_second']:.1f} MB/s "
+          f"({report['bytes_served'] / 1024 / 1024:.1f} MB served)")
+    if report["latency_p50"] is not None:
+        print(f"  latency: p50 {report['latency_p50'] * 1000:.1f} ms, p95 {report['latency_p95'] * 1000:.1f} ms, "
+              f"p99 {report['latency_p99'] * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the TIFF file servers with viewer-like range requests")
+    parser.add_argument("slides", nargs="*", help="Slides or directories of slides to synthesize viewer traffic for")
+    parser.add_argument("--trace", default=None, help="Replay a trace recorded with server.py/file_server.py --trace")
+    parser.add_argument("--server", default=None, help="URL of a running server")
+    parser.add_argument("--server-type", choices=SERVER_TYPES, default="fastapi",
+                        help="fastapi for server.py, simple for file_server.py; decides how paths are encoded")
+    parser.add_argument("--start", action="store_true", help="Start the server of --server-type on a free port")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8],
+                        help="Viewers running at once; several values run one test each")
+    parser.add_argument("--viewers", type=int, default=64, help="Viewer sessions to synthesize")
+    parser.add_argument("--zoom-steps", type=int, default=3, help="Levels each synthetic viewer zooms in")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the reports to this JSON file")
+    args = parser.parse_args()
+
+    if args.trace:
+        sessions = read_trace(args.trace)
+    else:
+        slides = find_slides(args.slides)
+        if not slides:
+            parser.error("give slides to synthesize traffic for, or --trace")
+        rng = random.Random(args.seed)
+        sessions = [
+            synthesize_session(slides[i % len(slides)], args.zoom_steps, rng=rng)
+            for i in range(args.viewers)
+        ]
+
+    process = None
+    server_url = args.server
+    if args.start:
+        process, server_url = start_server(args.server_type)
+    elif not server_url:
+        parser.error("give --server or --start")
+
+    try:
+        reports = []
+        for concurrency in args.concurrency:
+            report = replay(server_url, args.server_type, sessions, concurrency)
+            print_report(report)
+            reports.append(report)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"Reports saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Time the app's file listing, thumbnail, backup and pagination paths and store the results as JSON
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from generate_slides import generate_slides  # noqa: E402
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+EXCLUDED_FRACTION = 0.1  # Share of images excluded in the synthetic backups
+PAGE_SAMPLES = 1_000  # Random pages sliced per list size
+
+
+def time_call(function, repeat, setup=None):
+    """Run function repeat times and return the durations in seconds"""
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def summarize(name, durations, size=None, **extra):
+    """Result record with min/median/mean of the durations"""
+    result = {
+        "name": name,
+        "size": size,
+        "repeat": len(durations),
+        "min": min(durations),
+        "median": statistics.median(durations),
+        "mean": statistics.fmean(durations),
+    }
+    result.update(extra)
+    size_label = f" [{size}]" if size is not None else ""
+    print(f"{name}{size_label}: median {result['median'] * 1000:.2f} ms, min {result['min'] * 1000:.2f} ms")
+    return result
+
+
+def synthetic_paths(directory, count):
+    return [f"{directory}/slide_{i:07d}.tif" for i in range(count)]
+
+
+def bench_load_image_files(app, sizes, repeat):
+    """Directory listing with empty placeholder files, so only the listing is measured"""
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            for path in synthetic_paths(directory, size):
+                Path(path).touch()
+            durations = time_call(lambda: app.load_image_files(directory), repeat)
+            results.append(summarize("load_image_files", durations, size))
+    return results
+
+
+def bench_thumbnails(app, slides, repeat):
+    results = []
+    for name, function in [
+        ("create_pyvips_thumbnail", app.create_pyvips_thumbnail),
+        ("create_thumbnail", app.create_thumbnail),
+    ]:
+        durations = []
+        for slide in slides:
+            durations.extend(time_call(lambda: function(str(slide)), repeat))
+        results.append(summarize(name, durations, len(slides)))
+    return results
+
+
+def bench_backups(app, sizes, repeat):
+    """Save and load backups of sessions with growing image lists"""
+    st = app.st
+    results = []
+    for size in sizes:
+        image_index = app.ImageIndex(synthetic_paths("/data/slides", size))
+        excluded_images = app.ExclusionSet(size)
+        rng = random.Random(size)
+        reason_count = len(app.DEFAULT_EXCLUSION_REASONS)
+        for image_id in rng.sample(range(size), int(size * EXCLUDED_FRACTION)):
+            excluded_images.exclude(image_id, rng.randrange(reason_count))
+
+        st.session_state.image_files = image_index
+        st.session_state.excluded_images = excluded_images
+        backup_path = app.save_backup("benchmark.json")
+        backup_bytes = backup_path.stat().st_size
+
+        durations = time_call(lambda: app.save_backup("benchmark.json"), repeat)
+        results.append(summarize("save_backup", durations, size, bytes=backup_bytes))
+        # Clear the parsed-backup cache so every load reads and parses the file
+        durations = time_call(lambda: app.load_backup(backup_path), repeat, setup=app.read_backup.clear)
+        results.append(summarize("load_backup", durations, size, bytes=backup_bytes))
+    return results
+
+
+def bench_page_slicing(app, sizes, repeat):
+    """Compute bounds and materialize the paths of random pages"""
+    results = []
+    images_per_page = 30
+    for size in sizes:
+        image_index = app.ImageIndex(synthetic_paths("/data/slides", size))
+        total_pages = app.get_total_pages(size, images_per_page)
+        pages = random.Random(size).choices(range(total_pages), k=PAGE_SAMPLES)
+
+        def slice_pages():
+            for page in pages:
+                start_idx, end_idx = app.get_page_bounds(page, size, images_per_page)
+                list(image_index[start_idx:end_idx].items())
+
+        durations = time_call(slice_pages, repeat)
+        results.append(summarize("page_slicing", durations, size, pages=PAGE_SAMPLES))
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print the median change of each benchmark against an earlier results file"""
+    with open(baseline_path, 'r') as f:
+        baseline = {(r["name"], r["size"]): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        previous = baseline.get((result["name"], result["size"]))
+        if previous is None:
+            continue
+        change = (result["median"] - previous["median"]) / previous["median"] * 100
+        print(f"{result['name']} [{result['size']}]: {change:+.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Image Excluder benchmarks")
+    parser.add_argument("--slides-dir", default=None,
+                        help="Directory with pyramid TIFFs for the thumbnail benchmarks (generated when missing)")
+    parser.add_argument("--slide-count", type=int, default=5)
+    parser.add_argument("--slide-width", type=int, default=8192)
+    parser.add_argument("--slide-height", type=int, default=6144)
+    parser.add_argument("--slide-levels", type=int, default=5)
+    parser.add_argument("--compression", default="jpeg")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated image list sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="Results file (default: results/<timestamp>_<revision>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        slides_dir = Path(args.slides_dir or Path(work_dir) / "slides")
+        slides = generate_slides(slides_dir, args.slide_count, args.slide_width, args.slide_height,
+                                 args.slide_levels, args.compression)
+
+        import_start = time.perf_counter()
+        import app
+        import_seconds = time.perf_counter() - import_start
+        app.BACKUP_DIR = Path(work_dir) / "backups"  # Keep benchmark backups out of the real backup list
+
+        results = [summarize("import_app", [import_seconds])]
+        results += bench_load_image_files(app, sizes, args.repeat)
+        results += bench_thumbnails(app, slides, args.repeat)
+        results += bench_backups(app, sizes, args.repeat)
+        results += bench_page_slicing(app, sizes, args.repeat)
+
+    import pyvips
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "libvips": f"{pyvips.version(0)}.{pyvips.version(1)}.{pyvips.version(2)}",
+        "settings": {
+            "sizes": sizes,
+            "repeat": args.repeat,
+            "slide_count": args.slide_count,
+            "slide_width": args.slide_width,
+            "slide_height": args.slide_height,
+            "slide_levels": args.slide_levels,
+            "compression": args.compression,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        output_path = Path(args.output)
+    else:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = RESULTS_DIR / f"{timestamp}_{report['git_revision'] or 'unknown'}.json"
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output_path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
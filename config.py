@@ -4,7 +4,10 @@
 DEFAULT_IMAGES_PER_PAGE = 15  # Show 15 images per page
 PAGE_OVERLAP = 5  # Overlap 5 images between consecutive pages
 THUMBNAIL_SIZE = (400, 400)  # Increased for better quality
+THUMBNAIL_CACHE_ENTRIES = 500  # Card view thumbnails kept in memory and shared between sessions
+SERVER_THUMBNAIL_CACHE_ENTRIES = 1024  # Thumbnails rendered by the file server kept in memory, so a page's first paint is cheap
 SUPPORTED_EXTENSIONS = ['.tif', '.tiff', '.TIF', '.TIFF', '.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG']
+SUPPORTED_ARCHIVE_EXTENSIONS = ['.tar', '.TAR', '.zip', '.ZIP']  # Uncompressed shards; images are read in place
 
 # Default exclusion reasons
 DEFAULT_EXCLUSION_REASONS = [
@@ -16,9 +19,35 @@ DEFAULT_EXCLUSION_REASONS = [
     "different depth available",
 ]
 
+# Client-side review grid settings
+USE_CLIENT_GRID = True  # Keep exclusion toggles in the browser and send them in batches
+GRID_DEBOUNCE_MS = 400  # Wait this long after the last toggle before sending a batch
+
+# Triage mode settings
+TRIAGE_PREFETCH = 5  # Slides ahead whose headers and thumbnails are fetched in the background
+TRIAGE_WINDOW = 40  # Slides sent to the browser at once; a new window is requested near its end
+TRIAGE_VIEWER_HEIGHT = 650
+
 # OpenSeadragon viewer settings
+VIEWER_MODES = {"hybrid": "🔍 Hybrid", "viewer": "🔬 Zoomable viewer", "thumbnail": "🖼️ Thumbnail"}
+DEFAULT_VIEWER_MODE = "hybrid"  # Thumbnails first, a zoomable viewer only for the card being looked at
+HYBRID_MAX_VIEWERS = 4  # Zoomable viewers open at once in hybrid mode
+HYBRID_IDLE_SECONDS = 60  # Close a hybrid-mode viewer after this long without interaction
+HYBRID_HOVER_DELAY_MS = 300  # Hover this long over a thumbnail before its viewer opens
 VIEWER_HEIGHT = 350  # Reduced for better performance
 SHOW_NAVIGATION_CONTROL = True
 SHOW_ZOOM_CONTROL = True
 SHOW_HOME_CONTROL = True
 SHOW_FULLPAGE_CONTROL = False
+
+# File server settings
+WARM_CACHE_MB = 256  # Memory for slide data prefetched by the in-process server (server.py: --warm-cache-mb)
+
+# Shared review settings
+REVIEW_DB_PATH = "review_state.sqlite"  # SQLite database shared by all reviewer sessions
+SHARED_SYNC_INTERVAL = 5  # Seconds between pulls of other reviewers' changes
+
+# Validation settings
+VALIDATION_CACHE_PATH = "validation_cache.sqlite"  # Results are reused until a file's size or mtime changes
+MIN_PYRAMID_LEVELS = 1  # Tiled levels a TIFF needs to pass validation
+INVALID_FILE_REASON = "corrupt or truncated file"  # Exclusion reason for files that fail validation
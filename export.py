@@ -0,0 +1,120 @@
+"""
+Streamed export of excluded images to CSV and Parquet
+"""
+import csv
+import importlib.util
+import io
+import os
+import tempfile
+from itertools import islice
+
+from archive_index import image_stem, open_vips_image
+
+EXPORT_COLUMNS = ["image_stem", "exclusion_reason", "full_path"]
+DIMENSION_COLUMNS = ["width", "height", "levels"]
+EXPORT_CHUNK_SIZE = 10_000  # Rows per CSV chunk / Parquet row group
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def available_export_formats():
+    """Export formats whose dependencies are installed; Parquet needs the optional pyarrow"""
+    return [f for f in EXPORT_FORMATS if f != "Parquet" or importlib.util.find_spec("pyarrow") is not None]
+
+
+def iter_export_rows(image_index, exclusions, exclusion_reasons, metadata=None):
+    """Yield one row dict per excluded image.
+
+    metadata is an optional callable returning extra column values for a path.
+    """
+    for image_id, reason_code in exclusions.items():
+        filepath = image_index[image_id]
+        row = {
+            "image_stem": image_stem(filepath),
+            "exclusion_reason": exclusion_reasons[reason_code],
+            "full_path": filepath,
+        }
+        if metadata is not None:
+            row.update(metadata(filepath))
+        yield row
+
+
+def iter_row_chunks(rows, chunk_size=EXPORT_CHUNK_SIZE):
+    """Group rows into lists of at most chunk_size rows"""
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+def iter_csv_chunks(rows, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the CSV export as text chunks, starting with the header"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore', lineterminator='\n')
+    writer.writeheader()
+    for chunk in iter_row_chunks(rows, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_parquet(rows, columns, sink, integer_columns=(), chunk_size=EXPORT_CHUNK_SIZE):
+    """Write rows to a Parquet file or buffer, one row group per chunk.
+
+    integer_columns are stored as int64, every other column as string.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(c, pa.int64() if c in integer_columns else pa.string()) for c in columns])
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in iter_row_chunks(rows, chunk_size):
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+
+
+def build_export(rows, columns, export_format="CSV", integer_columns=()):
+    """Stream the export chunk by chunk into a temporary file and return its path.
+
+    The caller owns the file and removes it when the export is no longer needed.
+    """
+    extension, _ = EXPORT_FORMATS[export_format]
+    fd, path = tempfile.mkstemp(prefix="excluded_images_", suffix=f".{extension}")
+    try:
+        if export_format == "Parquet":
+            with os.fdopen(fd, 'wb') as f:
+                write_parquet(rows, columns, f, integer_columns)
+        else:
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+                for chunk in iter_csv_chunks(rows, columns):
+                    f.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def read_image_dimensions(image_path):
+    """Read width, height and pyramid level count from the image header"""
+    try:
+        with open_vips_image(image_path, access='sequential') as image:
+            return {"width": image.width, "height": image.height, "levels": image.get_n_pages()}
+    except Exception:
+        return {"width": None, "height": None, "levels": None}
+
+
+def read_score_table(csv_file):
+    """Read a CSV with an image_stem column into ({image_stem: {column: value}}, score columns)"""
+    text = csv_file.read()
+    if isinstance(text, bytes):
+        text = text.decode("utf-8-sig")
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or "image_stem" not in reader.fieldnames:
+        raise ValueError("Score table needs an 'image_stem' column")
+
+    score_columns = [c for c in reader.fieldnames if c not in EXPORT_COLUMNS]
+    scores = {row["image_stem"]: {c: row[c] for c in score_columns} for row in reader}
+    return scores, score_columns
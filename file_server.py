@@ -6,10 +6,24 @@ import socketserver
 from http.server import SimpleHTTPRequestHandler
 from urllib.parse import unquote
 import threading
+import argparse
+import time
+from request_trace import TraceWriter, TRACE_LOG_ENV
 
 class CORSHTTPRequestHandler(SimpleHTTPRequestHandler):
     """HTTP request handler with CORS support and range request handling"""
     
+    trace = None  # TraceWriter when requests are traced for the load tester
+    
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+    
+    def send_header(self, keyword, value):
+        if keyword == 'Content-Length':
+            self._content_length = int(value)
+        super().send_header(keyword, value)
+    
     def end_headers(self):
         """Add CORS headers to all responses"""
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -24,7 +38,26 @@ class CORSHTTPRequestHandler(SimpleHTTPRequestHandler):
         self.end_headers()
     
     def do_GET(self):
-        """Handle GET requests with range support"""
+        """Handle GET requests with range support, tracing them when enabled"""
+        if self.trace is None:
+            self.serve_get()
+            return
+        
+        start = time.perf_counter()
+        self._status = None
+        self._content_length = 0
+        self.serve_get()
+        self.trace.record(
+            self.client_address[0],
+            unquote(self.path[1:]),
+            self.headers.get('Range'),
+            self._status,
+            self._content_length,
+            time.perf_counter() - start,
+        )
+    
+    def serve_get(self):
+        """Serve a file or a byte range of it"""
         # Decode the file path
         file_path = unquote(self.path[1:])  # Remove leading '/'
         
@@ -88,8 +121,17 @@ def start_file_server(port=5000):
         httpd.serve_forever()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Start simple TIFF file server")
+    parser.add_argument("--port", type=int, default=5000, help="Port to run server on")
+    parser.add_argument("--trace", default=os.environ.get(TRACE_LOG_ENV),
+                        help="Append a JSON-lines trace of file requests to this path")
+    args = parser.parse_args()
+    
+    if args.trace:
+        CORSHTTPRequestHandler.trace = TraceWriter(args.trace)
+    
     # Start server in a separate thread so it doesn't block
-    server_thread = threading.Thread(target=start_file_server, daemon=True)
+    server_thread = threading.Thread(target=start_file_server, args=(args.port,), daemon=True)
     server_thread.start()
     
     try:
@@ -0,0 +1,234 @@
+"""
+Compact representations of large image lists and their exclusions
+"""
+import hashlib
+import os
+import re
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+
+from archive_index import image_name
+
+# Matches any byte that marks an excluded image in ExclusionSet
+_EXCLUDED_BYTE = re.compile(rb'[^\x00]')
+
+
+class ImageIndex(Sequence):
+    """Read-only list of image paths stored as shared directory prefixes plus an array-backed name table.
+
+    Paths are addressed by integer id (their position in the index). Instances are
+    immutable, so a single index can be shared between Streamlit sessions.
+    """
+
+    def __init__(self, paths=()):
+        directories = []
+        directory_ids = {}
+        dir_ids = array('I')
+        name_offsets = array('Q', [0])
+        names = bytearray()
+        is_sorted = True
+        previous = None
+
+        for path in paths:
+            # Keep the separator on the prefix so paths round-trip exactly
+            directory, sep, name = path.rpartition(os.sep)
+            directory += sep
+            dir_id = directory_ids.get(directory)
+            if dir_id is None:
+                dir_id = directory_ids[directory] = len(directories)
+                directories.append(directory)
+            dir_ids.append(dir_id)
+            names += name.encode('utf-8', 'surrogateescape')
+            name_offsets.append(len(names))
+
+            if previous is not None and path < previous:
+                is_sorted = False
+            previous = path
+
+        self.directories = tuple(directories)
+        self._dir_ids = dir_ids
+        self._name_offsets = name_offsets
+        self._names = bytes(names)
+        self._is_sorted = is_sorted
+        self._lookup = None
+        self._fingerprint = None
+
+    def __len__(self):
+        return len(self._dir_ids)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return ImageIndexSlice(self, start, max(start, stop))
+
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("image index out of range")
+        name = self._names[self._name_offsets[item]:self._name_offsets[item + 1]]
+        return self.directories[self._dir_ids[item]] + name.decode('utf-8', 'surrogateescape')
+
+    def __iter__(self):
+        for image_id in range(len(self)):
+            yield self[image_id]
+
+    def __contains__(self, path):
+        return self.index_of(path) is not None
+
+    def name(self, image_id):
+        """Return the file name of an image for display; archive members are named after the member"""
+        return image_name(self._stored_name(image_id))
+
+    def _stored_name(self, image_id):
+        """Return the path of an image without its directory prefix"""
+        name = self._names[self._name_offsets[image_id]:self._name_offsets[image_id + 1]]
+        return name.decode('utf-8', 'surrogateescape')
+
+    def index_of(self, path):
+        """Return the id of a path, or None if it is not in the index"""
+        if self._is_sorted:
+            image_id = bisect_left(self, path)
+            if image_id < len(self) and self[image_id] == path:
+                return image_id
+            return None
+
+        if self._lookup is None:
+            self._lookup = {p: i for i, p in enumerate(self)}
+        return self._lookup.get(path)
+
+    def fingerprint(self):
+        """Hex digest identifying the paths and their order, to check that two indexes are the same list"""
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            digest.update("\0".join(self.directories).encode('utf-8', 'surrogateescape'))
+            for part in (self._dir_ids, self._name_offsets):
+                digest.update(part.tobytes())
+            digest.update(self._names)
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def to_dict(self):
+        """Serialise the index to a JSON-compatible dict"""
+        return {
+            "directories": list(self.directories),
+            "dir_ids": self._dir_ids.tolist(),
+            "names": [self._stored_name(i) for i in range(len(self))],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild an index from the output of to_dict"""
+        directories = data.get("directories", [])
+        return cls(directories[d] + name for d, name in zip(data.get("dir_ids", []), data.get("names", [])))
+
+
+class ImageIndexSlice(Sequence):
+    """Window onto a contiguous range of an ImageIndex that does not copy any paths"""
+
+    def __init__(self, index, start, stop):
+        self.index = index
+        self.ids = range(start, stop)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            ids = self.ids[item]
+            if ids.step != 1:
+                return [self.index[i] for i in ids]
+            return ImageIndexSlice(self.index, ids.start, max(ids.start, ids.stop))
+        return self.index[self.ids[item]]
+
+    def __iter__(self):
+        for image_id in self.ids:
+            yield self.index[image_id]
+
+    def items(self):
+        """Yield (image_id, path) pairs for the images in the slice"""
+        for image_id in self.ids:
+            yield image_id, self.index[image_id]
+
+
+class ExclusionSet:
+    """Excluded image ids mapped to reason codes.
+
+    A reason code is the position of the reason in the session's exclusion reason
+    list. State is one byte per image in the index, where 0 means included.
+    The version counter increases on every change so derived data can be cached.
+    """
+
+    MAX_REASONS = 255
+
+    def __init__(self, size=0):
+        self._codes = bytearray(size)
+        self.version = 0
+
+    def __len__(self):
+        return len(self._codes) - self._codes.count(0)
+
+    def __bool__(self):
+        return _EXCLUDED_BYTE.search(self._codes) is not None
+
+    def __contains__(self, image_id):
+        return 0 <= image_id < len(self._codes) and self._codes[image_id] != 0
+
+    def __iter__(self):
+        for match in _EXCLUDED_BYTE.finditer(self._codes):
+            yield match.start()
+
+    @property
+    def size(self):
+        return len(self._codes)
+
+    def reason_code(self, image_id):
+        """Return the reason code for an excluded image, or None if it is included"""
+        if image_id not in self:
+            return None
+        return self._codes[image_id] - 1
+
+    def exclude(self, image_id, reason_code):
+        """Mark an image as excluded with the given reason code"""
+        if not 0 <= reason_code < self.MAX_REASONS:
+            raise ValueError(f"Reason code must be between 0 and {self.MAX_REASONS - 1}")
+        self._codes[image_id] = reason_code + 1
+        self.version += 1
+
+    def include(self, image_id):
+        """Mark an image as included again"""
+        self._codes[image_id] = 0
+        self.version += 1
+
+    def items(self):
+        """Yield (image_id, reason_code) pairs for all excluded images"""
+        for match in _EXCLUDED_BYTE.finditer(self._codes):
+            yield match.start(), match.group()[0] - 1
+
+    def reason_counts(self):
+        """Return {reason_code: count} for all reasons in use"""
+        counts = {}
+        for code in range(1, max(self._codes, default=0) + 1):
+            count = self._codes.count(code)
+            if count:
+                counts[code - 1] = count
+        return counts
+
+    def to_dict(self):
+        """Serialise the exclusions to a JSON-compatible dict"""
+        ids = []
+        reason_codes = []
+        for image_id, reason_code in self.items():
+            ids.append(image_id)
+            reason_codes.append(reason_code)
+        return {"size": len(self._codes), "ids": ids, "reason_codes": reason_codes}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild exclusions from the output of to_dict"""
+        exclusions = cls(data.get("size", 0))
+        for image_id, reason_code in zip(data.get("ids", []), data.get("reason_codes", [])):
+            exclusions.exclude(image_id, reason_code)
+        return exclusions
@@ -0,0 +1,58 @@
+"""
+Optional JSON-lines log of the file requests a server answers, for replay by the load tester
+"""
+import json
+import threading
+import time
+
+TRACE_LOG_ENV = "IMAGE_EXCLUDER_TRACE_LOG"  # Servers append a trace to this file when it is set
+
+
+def parse_range(range_header):
+    """Return (start, end) of a "bytes=start-end" header; parts that are missing are None"""
+    if not range_header or not range_header.startswith('bytes='):
+        return None, None
+    start, _, end = range_header[6:].partition('-')
+    try:
+        return (int(start) if start else None), (int(end) if end else None)
+    except ValueError:
+        return None, None
+
+
+class TraceWriter:
+    """Appends one JSON line per request; safe to share between server threads"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', buffering=1)
+        self._lock = threading.Lock()
+
+    def record(self, client, path, range_header, status, size, duration):
+        start, end = parse_range(range_header)
+        line = json.dumps({
+            "time": time.time(),
+            "client": client,
+            "path": path,
+            "start": start,
+            "end": end,
+            "status": status,
+            "bytes": size,
+            "duration": duration,
+        }, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + "\n")
+
+
+def read_trace(path):
+    """Read a trace into viewer sessions: [(path, start, end)] per client host and file, in request order"""
+    sessions = {}
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry.get("status", 200) >= 400:
+                continue
+            key = (entry.get("client"), entry["path"])
+            sessions.setdefault(key, []).append((entry["path"], entry.get("start"), entry.get("end")))
+    return list(sessions.values())
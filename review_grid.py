@@ -0,0 +1,43 @@
+"""
+Bidirectional page grid component that keeps exclusion toggles in the browser
+"""
+from pathlib import Path
+import streamlit.components.v1 as components
+
+_FRONTEND_DIR = Path(__file__).parent / "frontend" / "review_grid"
+_review_grid = components.declare_component("review_grid", path=str(_FRONTEND_DIR))
+
+
+def review_grid(cards, exclusion_reasons, page_key, list_key, acknowledged=None, mode="viewer", columns=5,
+                viewer_height=300, debounce_ms=400, max_viewers=4, idle_seconds=60, hover_delay_ms=300, key=None):
+    """Render a page of image cards and return the latest batch of changes.
+
+    Each card is a dict with id, name, url, thumbnail_url and reason (None when included).
+    Toggles are applied in the browser straight away and sent back as one
+    {"session", "batch", "list_key", "changes": {image_id: reason or None}} value after
+    debounce_ms of inactivity. The grid is only rebuilt when page_key changes.
+
+    Changes are sent again with every batch until acknowledged, the (session, batch)
+    Python applied last, covers them; list_key identifies the image list the ids
+    belong to, and changes to another list are dropped.
+
+    mode is "viewer", "thumbnail" or "hybrid". Hybrid cards show a thumbnail and
+    open a zoomable viewer after hover_delay_ms of hovering, on click or on focus;
+    at most max_viewers stay open and viewers idle for idle_seconds are closed.
+    """
+    return _review_grid(
+        cards=cards,
+        reasons=exclusion_reasons,
+        page_key=page_key,
+        list_key=list_key,
+        acknowledged=acknowledged,
+        mode=mode,
+        columns=columns,
+        viewer_height=viewer_height,
+        debounce_ms=debounce_ms,
+        max_viewers=max_viewers,
+        idle_seconds=idle_seconds,
+        hover_delay_ms=hover_delay_ms,
+        key=key,
+        default=None,
+    )
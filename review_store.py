@@ -0,0 +1,222 @@
+"""
+SQLite-backed review state shared between reviewer sessions
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_LEASE_SECONDS = 30 * 60  # A page lease expires after 30 minutes without renewal
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exclusions (
+    cohort TEXT NOT NULL,
+    path TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    reviewer TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (cohort, path)
+);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    cohort TEXT NOT NULL,
+    path TEXT NOT NULL,
+    reason TEXT,
+    reviewer TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    session TEXT
+);
+CREATE INDEX IF NOT EXISTS changes_by_cohort ON changes (cohort, seq);
+CREATE TABLE IF NOT EXISTS leases (
+    cohort TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    reviewer TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (cohort, page)
+);
+CREATE TABLE IF NOT EXISTS cohorts (
+    cohort TEXT PRIMARY KEY,
+    images_per_page INTEGER NOT NULL,
+    image_count INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL
+);
+"""
+
+
+class ReviewStore:
+    """Exclusions, change feed and page leases for shared cohorts.
+
+    One store is shared by every session in a process; sessions in other processes
+    can open the same database file. Each thread gets its own SQLite connection.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        """Return the SQLite connection of the current thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        """Start a write transaction and return the connection"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    def apply_changes(self, cohort, reviewer, changes, session=None):
+        """Apply (path, reason) changes in one transaction; a reason of None includes the image.
+
+        session identifies the app session making the changes, so it can skip them in changes_since.
+        Returns the sequence number of the last change, or None if nothing was applied.
+        """
+        if not changes:
+            return None
+
+        now = time.time()
+        conn = self._transaction()
+        try:
+            for path, reason in changes:
+                if reason is None:
+                    conn.execute("DELETE FROM exclusions WHERE cohort = ? AND path = ?", (cohort, path))
+                else:
+                    conn.execute(
+                        "INSERT INTO exclusions (cohort, path, reason, reviewer, updated_at) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (cohort, path) DO UPDATE SET reason = excluded.reason, "
+                        "reviewer = excluded.reviewer, updated_at = excluded.updated_at",
+                        (cohort, path, reason, reviewer, now),
+                    )
+            conn.executemany(
+                "INSERT INTO changes (cohort, path, reason, reviewer, created_at, session) VALUES (?, ?, ?, ?, ?, ?)",
+                [(cohort, path, reason, reviewer, now, session) for path, reason in changes],
+            )
+            last_seq = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            conn.execute("COMMIT")
+            return last_seq
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def load_exclusions(self, cohort):
+        """Return ({path: reason}, latest sequence number) for a cohort"""
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            exclusions = dict(conn.execute("SELECT path, reason FROM exclusions WHERE cohort = ?", (cohort,)))
+            last_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes WHERE cohort = ?", (cohort,)).fetchone()[0]
+        finally:
+            conn.execute("COMMIT")
+        return exclusions, last_seq
+
+    def changes_since(self, cohort, seq, exclude_session=None):
+        """Return [(seq, path, reason, reviewer)] for changes after seq, oldest first.
+
+        Changes made by exclude_session are left out; the same reviewer's other sessions are not.
+        """
+        query = "SELECT seq, path, reason, reviewer FROM changes WHERE cohort = ? AND seq > ?"
+        params = [cohort, seq]
+        if exclude_session is not None:
+            query += " AND session IS NOT ?"
+            params.append(exclude_session)
+        return self._connection().execute(query + " ORDER BY seq", params).fetchall()
+
+    def register_cohort(self, cohort, images_per_page, image_count, fingerprint):
+        """Return the cohort's (images_per_page, image_count, fingerprint), recording these on first use.
+
+        Leases are by page number, so every reviewer of a cohort has to page the same way
+        through the same image list; callers compare the result with their own.
+        """
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR IGNORE INTO cohorts (cohort, images_per_page, image_count, fingerprint) VALUES (?, ?, ?, ?)",
+            (cohort, images_per_page, image_count, fingerprint),
+        )
+        return conn.execute(
+            "SELECT images_per_page, image_count, fingerprint FROM cohorts WHERE cohort = ?", (cohort,)
+        ).fetchone()
+
+    @staticmethod
+    def _taken_pages(conn, cohort, now):
+        """Pages of a cohort that are completed or under an open lease"""
+        return {row[0] for row in conn.execute(
+            "SELECT page FROM leases WHERE cohort = ? AND (completed = 1 OR expires_at > ?)", (cohort, now)
+        )}
+
+    def acquire_page(self, cohort, reviewer, total_pages, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Lease a page nobody else is working on and return its number.
+
+        A reviewer that already holds an open lease gets the same page back with the
+        lease renewed. Returns None when every page is completed or leased.
+        """
+        now = time.time()
+        conn = self._transaction()
+        try:
+            held = conn.execute(
+                "SELECT page FROM leases WHERE cohort = ? AND reviewer = ? AND completed = 0 AND expires_at > ? "
+                "ORDER BY page LIMIT 1",
+                (cohort, reviewer, now),
+            ).fetchone()
+            if held is not None:
+                page = held[0]
+            else:
+                taken = self._taken_pages(conn, cohort, now)
+                page = next((p for p in range(total_pages) if p not in taken), None)
+
+            if page is not None:
+                conn.execute(
+                    "INSERT INTO leases (cohort, page, reviewer, expires_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (cohort, page) DO UPDATE SET reviewer = excluded.reviewer, "
+                    "expires_at = excluded.expires_at, completed = 0",
+                    (cohort, page, reviewer, now + lease_seconds),
+                )
+            conn.execute("COMMIT")
+            return page
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def next_free_page(self, cohort, total_pages, skip=()):
+        """Return the page acquire_page would hand out next, without leasing it; pages in skip are passed over"""
+        taken = self._taken_pages(self._connection(), cohort, time.time())
+        return next((p for p in range(total_pages) if p not in taken and p not in skip), None)
+
+    def renew_lease(self, cohort, reviewer, page, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Extend a reviewer's lease on a page; returns False if the lease was lost"""
+        cursor = self._connection().execute(
+            "UPDATE leases SET expires_at = ? WHERE cohort = ? AND page = ? AND reviewer = ? AND completed = 0",
+            (time.time() + lease_seconds, cohort, page, reviewer),
+        )
+        return cursor.rowcount > 0
+
+    def release_page(self, cohort, reviewer, page, completed=False):
+        """Give up a page lease, optionally marking the page as reviewed"""
+        if completed:
+            self._connection().execute(
+                "UPDATE leases SET completed = 1 WHERE cohort = ? AND page = ? AND reviewer = ?",
+                (cohort, page, reviewer),
+            )
+        else:
+            self._connection().execute(
+                "DELETE FROM leases WHERE cohort = ? AND page = ? AND reviewer = ? AND completed = 0",
+                (cohort, page, reviewer),
+            )
+
+    def progress(self, cohort):
+        """Return completed page count and active reviewers for a cohort"""
+        conn = self._connection()
+        completed = conn.execute(
+            "SELECT COUNT(*) FROM leases WHERE cohort = ? AND completed = 1", (cohort,)
+        ).fetchone()[0]
+        reviewers = [row[0] for row in conn.execute(
+            "SELECT DISTINCT reviewer FROM leases WHERE cohort = ? AND completed = 0 AND expires_at > ? ORDER BY reviewer",
+            (cohort, time.time()),
+        )]
+        return {"completed_pages": completed, "active_reviewers": reviewers}
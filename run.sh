@@ -1,12 +1,15 @@
 #!/bin/bash
 
-# Run the Image Excluder Streamlit app with separate FastAPI server
+# Run the Image Excluder Streamlit app
+# The app starts its FastAPI TIFF server in-process on a free port.
+# Pass --external-server to run server.py as a separate process on $SERVER_PORT (default 5000) instead.
 echo "🖼️  Starting Image Excluder..."
 echo "The app will open in your browser at http://localhost:8501"
-echo "FastAPI TIFF server will run on http://localhost:5000"
-echo "Press Ctrl+C to stop both services"
+echo "Press Ctrl+C to stop"
 echo ""
 
+SERVER_PORT=${SERVER_PORT:-5000}
+
 # Function to cleanup background processes
 cleanup() {
     echo "Stopping services..."
@@ -19,20 +22,21 @@ cleanup() {
 # Set up signal handling
 trap cleanup SIGINT SIGTERM
 
-# Start FastAPI server in background
-echo "Starting FastAPI TIFF server..."
-uv run python server.py --port 5000 &
-SERVER_PID=$!
-
-# Wait a moment for server to start
-sleep 3
-
-# Check if server started successfully
-if kill -0 $SERVER_PID 2>/dev/null; then
+if [ "$1" == "--external-server" ]; then
+    echo "Starting FastAPI TIFF server on http://localhost:$SERVER_PORT..."
+    uv run python server.py --port $SERVER_PORT &
+    SERVER_PID=$!
+
+    # Wait until the server answers its health check
+    until curl -sf "http://127.0.0.1:$SERVER_PORT/health" > /dev/null; do
+        if ! kill -0 $SERVER_PID 2>/dev/null; then
+            echo "❌ Failed to start FastAPI server"
+            exit 1
+        fi
+        sleep 0.1
+    done
     echo "✅ FastAPI server started successfully (PID: $SERVER_PID)"
-else
-    echo "❌ Failed to start FastAPI server"
-    exit 1
+    export IMAGE_EXCLUDER_SERVER_URL="http://127.0.0.1:$SERVER_PORT"
 fi
 
 # Start Streamlit app (this will block)
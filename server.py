@@ -2,10 +2,29 @@
 FastAPI server for serving TIFF files to GeoTIFFTileSource plugin
 """
 import os
+import socket
+import threading
+from functools import lru_cache
 import uvicorn
 from fastapi import FastAPI, Response, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
 import argparse
+import time
+from config import SERVER_THUMBNAIL_CACHE_ENTRIES
+from warmup import RangeCache, SlideWarmer, DEFAULT_WARM_CACHE_MB
+from archive_index import resolve_image, image_exists, vips_thumbnail
+from server_client import wait_until_healthy
+from request_trace import TraceWriter, TRACE_LOG_ENV
+
+THUMBNAIL_MAX_SIZE = 800  # Largest thumbnail edge the server will render
+
+# Slides announced through /prefetch are warmed into this cache in the background
+range_cache = RangeCache(int(os.environ.get("IMAGE_EXCLUDER_WARM_CACHE_MB", DEFAULT_WARM_CACHE_MB)) * 1024 * 1024)
+warmer = SlideWarmer(range_cache)
+
+class PrefetchRequest(BaseModel):
+    paths: list[str]
 
 app = FastAPI(title="TIFF File Server", description="Simple server for serving TIFF files with range request support")
 
@@ -18,23 +37,85 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def enable_trace(trace_path):
+    """Log every file request to a JSON-lines trace for the load tester; call before the server starts"""
+    trace = TraceWriter(trace_path)
+    
+    @app.middleware("http")
+    async def trace_requests(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        path = request.url.path[1:]
+        if path != "health" and not path.startswith(("prefetch", "thumbnail/")):
+            trace.record(
+                request.client.host if request.client else None,
+                path.replace('__SLASH__', '/'),
+                request.headers.get('range'),
+                response.status_code,
+                int(response.headers.get('content-length', 0)),
+                time.perf_counter() - start,
+            )
+        return response
+
+if os.environ.get(TRACE_LOG_ENV):
+    enable_trace(os.environ[TRACE_LOG_ENV])
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "ok"}
 
+@app.post("/prefetch")
+async def prefetch(request: PrefetchRequest):
+    """Warm slides the viewer is about to open: readahead, header parsing and lowest-level tiles"""
+    paths = [path for path in request.paths if image_exists(path)]
+    queued = warmer.warm(paths)
+    return {"queued": queued, "cache_bytes": range_cache.size}
+
+@lru_cache(maxsize=SERVER_THUMBNAIL_CACHE_ENTRIES)
+def render_thumbnail(file_path, mtime_ns, size):
+    """JPEG bytes of a thumbnail; the mtime is part of the cache key so changed files are redone"""
+    thumbnail = vips_thumbnail(file_path, size)
+    if thumbnail.hasalpha():
+        thumbnail = thumbnail.flatten(background=[255, 255, 255])
+    return thumbnail.jpegsave_buffer(Q=85)
+
+@app.get("/thumbnail/{file_path:path}")
+def serve_thumbnail(file_path: str, size: int = 400):
+    """Serve a JPEG thumbnail, letting libvips read the smallest pyramid level that fits"""
+    import pyvips  # Loading libvips is slow, so the server starts without it
+    
+    file_path = file_path.replace('__SLASH__', '/')
+    
+    if not image_exists(file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    _, _, _, mtime_ns = resolve_image(file_path)
+    
+    size = max(16, min(size, THUMBNAIL_MAX_SIZE))
+    try:
+        data = render_thumbnail(file_path, mtime_ns, size)
+    except pyvips.Error as e:
+        print(f"Error creating thumbnail for {file_path}: {e}")
+        raise HTTPException(status_code=500, detail="Error creating thumbnail")
+    
+    return Response(
+        content=data,
+        media_type='image/jpeg',
+        headers={'Cache-Control': 'public, max-age=3600'}
+    )
+
 @app.get("/{file_path:path}")
-async def serve_file(file_path: str, request: Request):
+def serve_file(file_path: str, request: Request):
     """Serve TIFF files with HTTP range support"""
     try:
         # Decode the file path
         file_path = file_path.replace('__SLASH__', '/')
         
-        if not os.path.exists(file_path):
+        if not image_exists(file_path):
             raise HTTPException(status_code=404, detail="File not found")
         
-        # Get file info
-        file_size = os.path.getsize(file_path)
+        # Get file info; archive members are read at their offset inside the archive
+        disk_path, base_offset, file_size, mtime_ns = resolve_image(file_path)
         
         # Handle range requests
         range_header = request.headers.get('range')
@@ -56,10 +137,12 @@ async def serve_file(file_path: str, request: Request):
             byte_end = min(file_size - 1, byte_end)
             content_length = byte_end - byte_start + 1
             
-            # Read the requested range
-            with open(file_path, 'rb') as f:
-                f.seek(byte_start)
-                file_data = f.read(content_length)
+            # Read the requested range, from the warm cache if the slide was prefetched
+            file_data = range_cache.get(file_path, mtime_ns, byte_start, byte_end + 1)
+            if file_data is None:
+                with open(disk_path, 'rb') as f:
+                    f.seek(base_offset + byte_start)
+                    file_data = f.read(content_length)
             
             headers = {
                 'Content-Range': f'bytes {byte_start}-{byte_end}/{file_size}',
@@ -76,8 +159,9 @@ async def serve_file(file_path: str, request: Request):
             )
         else:
             # Serve entire file
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
+            with open(disk_path, 'rb') as f:
+                f.seek(base_offset)
+                file_data = f.read(file_size)
             
             headers = {
                 'Content-Length': str(file_size),
@@ -95,11 +179,51 @@ async def serve_file(file_path: str, request: Request):
         print(f"Error serving file {file_path}: {e}")
         raise HTTPException(status_code=500, detail="Error serving file")
 
+class BackgroundServer:
+    """Runs the server in a daemon thread of the current process, on a free port by default"""
+    
+    def __init__(self, host="127.0.0.1", port=0, warm_cache_mb=None):
+        if warm_cache_mb is not None:
+            range_cache.budget_bytes = warm_cache_mb * 1024 * 1024
+        # Binding the socket here means the port is ours before uvicorn starts, without a race
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host, port))
+        self.host = host
+        self.port = self._socket.getsockname()[1]
+        self.url = f"http://{host}:{self.port}"
+        self._server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+        self._thread = threading.Thread(
+            target=self._server.run, kwargs={"sockets": [self._socket]}, name="tiff-server", daemon=True
+        )
+    
+    def start(self, timeout=10.0):
+        """Start serving and return once /health answers"""
+        self._thread.start()
+        if not wait_until_healthy(self.url, timeout, is_alive=self._thread.is_alive):
+            self.stop()
+            raise RuntimeError(f"TIFF file server did not become ready on {self.url}")
+        return self
+    
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+        self._socket.close()
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Start TIFF file server")
     parser.add_argument("--port", type=int, default=5000, help="Port to run server on")
     parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
+    parser.add_argument("--warm-cache-mb", type=int, default=None,
+                        help=f"Memory budget for prefetched slide data (default {DEFAULT_WARM_CACHE_MB})")
+    parser.add_argument("--trace", default=None, help="Append a JSON-lines trace of file requests to this path")
     args = parser.parse_args()
     
+    if args.trace and not os.environ.get(TRACE_LOG_ENV):
+        enable_trace(args.trace)
+    
+    if args.warm_cache_mb is not None:
+        range_cache.budget_bytes = args.warm_cache_mb * 1024 * 1024
+    
     print(f"Starting FastAPI TIFF server on http://{args.host}:{args.port}")
     uvicorn.run(app, host=args.host, port=args.port, log_level="info")
@@ -0,0 +1,55 @@
+"""
+Small HTTP client used by the app to talk to the tile/file server
+"""
+import json
+import threading
+import time
+import urllib.request
+from urllib.error import URLError
+
+
+def post_json(url, payload, timeout=2.0):
+    """POST a JSON payload and return the decoded response, or None on failure"""
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except (URLError, OSError, ValueError):
+        return None
+
+
+def get_json(url, timeout=2.0):
+    """GET a JSON response, or None on failure"""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.loads(response.read())
+    except (URLError, OSError, ValueError):
+        return None
+
+
+def wait_until_healthy(server_url, timeout=10.0, interval=0.02, is_alive=None):
+    """Poll the server's /health endpoint until it answers, the timeout passes or is_alive() turns false"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if get_json(f"{server_url}/health", timeout=interval * 10) is not None:
+            return True
+        if is_alive is not None and not is_alive():
+            return False
+        time.sleep(interval)
+    return False
+
+
+def request_prefetch(server_url, paths):
+    """Ask the server to warm slides without blocking the caller"""
+    if not paths:
+        return
+    threading.Thread(
+        target=post_json,
+        args=(f"{server_url}/prefetch", {"paths": list(paths)}),
+        daemon=True,
+    ).start()
@@ -0,0 +1,109 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+import archive_index
+from archive_index import (
+    INDEX_SUFFIX,
+    MemberFile,
+    image_name,
+    image_stem,
+    list_archive_images,
+    load_archive_index,
+    open_image,
+    open_vips_image,
+    resolve_image,
+    vips_thumbnail,
+)
+
+SLIDE = bytes(range(256)) * 4
+
+
+def make_zip(path):
+    with zipfile.ZipFile(path, "w") as archive:
+        stored = zipfile.ZipInfo("shard/slide_1.tif")
+        stored.compress_type = zipfile.ZIP_STORED
+        stored.extra = b"\xfe\xca\x04\x00DATA"  # Local header longer than name + fixed fields
+        archive.writestr(stored, SLIDE)
+        archive.writestr("slide_2.tif", SLIDE, compress_type=zipfile.ZIP_DEFLATED)
+    return str(path)
+
+
+def make_tar(path):
+    with tarfile.open(path, "w") as archive:
+        info = tarfile.TarInfo("slides/slide_1.tif")
+        info.size = len(SLIDE)
+        archive.addfile(info, io.BytesIO(SLIDE))
+    return str(path)
+
+
+def read_span(path):
+    file_path, offset, size, _ = resolve_image(path)
+    with open(file_path, "rb") as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+def test_zip_offsets_skip_local_header_extra_field(tmp_path):
+    archive = make_zip(tmp_path / "shard.zip")
+    # Deflated members cannot be served with byte ranges
+    assert list_archive_images(archive, [".tif"]) == [archive + "::shard/slide_1.tif"]
+    assert read_span(archive + "::shard/slide_1.tif") == SLIDE
+    with pytest.raises(FileNotFoundError):
+        resolve_image(archive + "::slide_2.tif")
+
+
+def test_tar_offsets(tmp_path):
+    archive = make_tar(tmp_path / "shard.tar")
+    assert read_span(archive + "::slides/slide_1.tif") == SLIDE
+    with open_image(archive + "::slides/slide_1.tif") as f:
+        assert f.read() == SLIDE
+
+
+def test_sidecar_index_is_reused(tmp_path, monkeypatch):
+    archive = make_tar(tmp_path / "shard.tar")
+    index = load_archive_index(archive)
+    assert os.path.exists(archive + INDEX_SUFFIX)
+
+    archive_index._index_cache.clear()
+    monkeypatch.setattr(archive_index, "build_archive_index", lambda path: pytest.fail("rescanned the archive"))
+    assert load_archive_index(archive) == index
+
+
+def test_member_file_is_a_window(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"headerSLIDEtrailer")
+    with MemberFile(str(path), 6, 5) as member:
+        assert member.read(3) == b"SLI"
+        assert member.read() == b"DE"
+        assert member.read(4) == b""  # Never reads past the member into the trailer
+        assert member.seek(-2, io.SEEK_END) == 3
+        assert member.read() == b"DE"
+        member.seek(1)
+        assert member.seek(2, io.SEEK_CUR) == 3
+        assert member.seek(100) == 100
+        assert member.read(1) == b""
+
+
+def test_image_names():
+    assert image_name("/d/shard.tar::slides/slide_1.tif") == "slide_1.tif"
+    assert image_name("/d/slide_2.tiff") == "slide_2.tiff"
+    assert image_stem("/d/shard.tar::slides/slide_1.tif") == "slide_1"
+
+
+def test_vips_reads_archive_members(tmp_path):
+    pyvips = pytest.importorskip("pyvips")
+    slide = pyvips.Image.black(512, 256).tiffsave_buffer(tile=True, pyramid=True)
+    archive = str(tmp_path / "shard.tar")
+    with tarfile.open(archive, "w") as tar:
+        info = tarfile.TarInfo("slide_1.tif")
+        info.size = len(slide)
+        tar.addfile(info, io.BytesIO(slide))
+
+    path = archive + "::slide_1.tif"
+    with open_vips_image(path, page=1) as image:
+        assert (image.width, image.avg()) == (256, 0)
+    assert vips_thumbnail(path, 64).width == 64
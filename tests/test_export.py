@@ -0,0 +1,85 @@
+import csv
+import io
+import os
+
+import pytest
+
+import export
+from export import (
+    DIMENSION_COLUMNS,
+    EXPORT_COLUMNS,
+    available_export_formats,
+    build_export,
+    iter_csv_chunks,
+    iter_export_rows,
+    read_score_table,
+    write_parquet,
+)
+from image_index import ExclusionSet, ImageIndex
+
+REASONS = ["grid", "blur"]
+
+
+def make_rows(count):
+    return [{"image_stem": f"s{i}", "exclusion_reason": "grid", "full_path": f"/d/s{i}.tif"} for i in range(count)]
+
+
+def test_export_rows_use_member_stems():
+    index = ImageIndex(["/d/a.tif", "/d/shard.tar::b.tiff", "/d/c.tif"])
+    exclusions = ExclusionSet(len(index))
+    exclusions.exclude(1, 1)
+    exclusions.exclude(2, 0)
+    rows = list(iter_export_rows(index, exclusions, REASONS, metadata=lambda path: {"width": len(path)}))
+    assert rows == [
+        {"image_stem": "b", "exclusion_reason": "blur", "full_path": "/d/shard.tar::b.tiff", "width": 20},
+        {"image_stem": "c", "exclusion_reason": "grid", "full_path": "/d/c.tif", "width": 8},
+    ]
+
+
+def test_csv_chunks():
+    chunks = list(iter_csv_chunks(make_rows(5), EXPORT_COLUMNS, chunk_size=2))
+    assert len(chunks) == 3
+    assert chunks[0].splitlines() == ["image_stem,exclusion_reason,full_path", "s0,grid,/d/s0.tif", "s1,grid,/d/s1.tif"]
+    assert chunks[2] == "s4,grid,/d/s4.tif\n"
+    assert list(iter_csv_chunks([], EXPORT_COLUMNS)) == ["image_stem,exclusion_reason,full_path\n"]
+
+
+def test_build_csv_export():
+    path = build_export(make_rows(3), EXPORT_COLUMNS + ["score"])
+    try:
+        assert path.endswith(".csv")
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["image_stem"] for row in rows] == ["s0", "s1", "s2"]
+        assert rows[0]["score"] == ""
+    finally:
+        os.remove(path)
+
+
+def test_parquet_schema_types_only_integer_columns():
+    pq = pytest.importorskip("pyarrow.parquet")
+    columns = EXPORT_COLUMNS + DIMENSION_COLUMNS + ["score"]
+    rows = [dict(row, width=10, height=None, levels=3, score="0.5") for row in make_rows(5)]
+    buffer = io.BytesIO()
+    write_parquet(rows, columns, buffer, integer_columns=DIMENSION_COLUMNS, chunk_size=2)
+
+    parquet_file = pq.ParquetFile(io.BytesIO(buffer.getvalue()))
+    assert parquet_file.metadata.num_row_groups == 3
+    schema = parquet_file.schema_arrow
+    assert [str(schema.field(c).type) for c in columns] == ["string"] * 3 + ["int64"] * 3 + ["string"]
+    table = parquet_file.read()
+    assert table.column("width").to_pylist() == [10] * 5
+    assert table.column("height").to_pylist() == [None] * 5
+
+
+def test_score_table():
+    scores, columns = read_score_table(io.BytesIO(b"\xef\xbb\xbfimage_stem,width,quality\ns0,wide,0.9\n"))
+    assert columns == ["width", "quality"]
+    assert scores == {"s0": {"width": "wide", "quality": "0.9"}}
+    with pytest.raises(ValueError):
+        read_score_table(io.StringIO("name,score\na,1\n"))
+
+
+def test_parquet_needs_pyarrow(monkeypatch):
+    monkeypatch.setattr(export.importlib.util, "find_spec", lambda name: None)
+    assert available_export_formats() == ["CSV"]
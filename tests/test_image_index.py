@@ -0,0 +1,98 @@
+import pytest
+
+from image_index import ImageIndex, ExclusionSet
+
+PATHS = [
+    "/data/a/slide_1.tif",
+    "/data/a/slide_2.tif",
+    "/data/b/slide_3.tif",
+    "/data/shard.tar::slide_4.tif",
+]
+
+
+def test_index_round_trips_paths():
+    index = ImageIndex(PATHS)
+    assert len(index) == len(PATHS)
+    assert list(index) == PATHS
+    assert index[-1] == PATHS[-1]
+    assert index.directories == ("/data/a/", "/data/b/", "/data/")
+    with pytest.raises(IndexError):
+        index[len(PATHS)]
+
+
+@pytest.mark.parametrize("paths", [PATHS, PATHS[::-1]])
+def test_index_of_sorted_and_unsorted(paths):
+    index = ImageIndex(paths)
+    for image_id, path in enumerate(paths):
+        assert index.index_of(path) == image_id
+        assert path in index
+    assert index.index_of("/data/a/missing.tif") is None
+
+
+def test_name_of_archive_member():
+    index = ImageIndex(PATHS)
+    assert index.name(0) == "slide_1.tif"
+    assert index.name(3) == "slide_4.tif"
+
+
+def test_slices_are_views():
+    index = ImageIndex(PATHS)
+    page = index[1:3]
+    assert page.ids == range(1, 3)
+    assert list(page) == PATHS[1:3]
+    assert list(page.items()) == [(1, PATHS[1]), (2, PATHS[2])]
+    assert list(page[1:]) == PATHS[2:3]
+    assert index[::2] == PATHS[::2]
+
+
+def test_index_dict_round_trip():
+    index = ImageIndex(PATHS)
+    data = index.to_dict()
+    assert data["names"][3] == "shard.tar::slide_4.tif"  # Stored names are not display names
+    assert list(ImageIndex.from_dict(data)) == PATHS
+
+
+def test_fingerprint_identifies_the_list():
+    assert ImageIndex(PATHS).fingerprint() == ImageIndex(list(PATHS)).fingerprint()
+    assert ImageIndex(PATHS).fingerprint() != ImageIndex(PATHS[:-1]).fingerprint()
+    assert ImageIndex(PATHS).fingerprint() != ImageIndex(PATHS[::-1]).fingerprint()
+
+
+def test_exclusion_set():
+    exclusions = ExclusionSet(5)
+    assert not exclusions
+    assert len(exclusions) == 0
+
+    exclusions.exclude(1, 0)
+    exclusions.exclude(3, 2)
+    exclusions.exclude(4, 2)
+    assert exclusions
+    assert len(exclusions) == 3
+    assert list(exclusions) == [1, 3, 4]
+    assert 3 in exclusions and 0 not in exclusions and 99 not in exclusions
+    assert exclusions.reason_code(3) == 2
+    assert exclusions.reason_code(0) is None
+    assert list(exclusions.items()) == [(1, 0), (3, 2), (4, 2)]
+    assert exclusions.reason_counts() == {0: 1, 2: 2}
+
+    version = exclusions.version
+    exclusions.include(3)
+    assert 3 not in exclusions
+    assert exclusions.version > version
+
+
+def test_exclusion_set_rejects_unknown_reason_codes():
+    exclusions = ExclusionSet(2)
+    with pytest.raises(ValueError):
+        exclusions.exclude(0, ExclusionSet.MAX_REASONS)
+    with pytest.raises(ValueError):
+        exclusions.exclude(0, -1)
+
+
+def test_exclusion_set_dict_round_trip():
+    exclusions = ExclusionSet(4)
+    exclusions.exclude(0, 1)
+    exclusions.exclude(2, 0)
+    restored = ExclusionSet.from_dict(exclusions.to_dict())
+    assert restored.size == 4
+    assert list(restored.items()) == [(0, 1), (2, 0)]
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from review_store import ReviewStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ReviewStore(tmp_path / "review.sqlite")
+
+
+def test_exclusions_and_change_feed(store):
+    first = store.apply_changes("cohort", "alice", [("a.tif", "grid"), ("b.tif", "blur")], session="s1")
+    store.apply_changes("cohort", "alice", [("a.tif", None)], session="s2")
+    store.apply_changes("other", "bob", [("c.tif", "grid")])
+
+    exclusions, last_seq = store.load_exclusions("cohort")
+    assert exclusions == {"b.tif": "blur"}
+    assert last_seq > first
+    assert store.apply_changes("cohort", "alice", []) is None
+
+    changes = store.changes_since("cohort", 0)
+    assert [(path, reason) for _, path, reason, _ in changes] == [("a.tif", "grid"), ("b.tif", "blur"), ("a.tif", None)]
+    # Only the session's own changes are skipped, not those of the same reviewer's other sessions
+    assert [path for _, path, _, _ in store.changes_since("cohort", 0, exclude_session="s1")] == ["a.tif"]
+    assert store.changes_since("cohort", last_seq) == []
+    # Changes written without a session are returned whether or not a session is skipped
+    assert [path for _, path, _, _ in store.changes_since("other", 0)] == ["c.tif"]
+    assert [path for _, path, _, _ in store.changes_since("other", 0, exclude_session="s1")] == ["c.tif"]
+
+
+def test_pages_are_leased_to_one_reviewer(store):
+    assert store.acquire_page("cohort", "alice", 3) == 0
+    assert store.acquire_page("cohort", "alice", 3) == 0  # Held lease is handed back
+    assert store.acquire_page("cohort", "bob", 3) == 1
+    assert store.next_free_page("cohort", 3) == 2
+    assert store.next_free_page("cohort", 3, skip={2}) is None
+
+    store.release_page("cohort", "alice", 0, completed=True)
+    assert store.acquire_page("cohort", "alice", 3) == 2
+    assert store.acquire_page("cohort", "carol", 3) is None
+
+    progress = store.progress("cohort")
+    assert progress == {"completed_pages": 1, "active_reviewers": ["alice", "bob"]}
+
+
+def test_expired_lease_cannot_be_renewed(store):
+    assert store.acquire_page("cohort", "alice", 2, lease_seconds=0.01) == 0
+    time.sleep(0.02)
+    assert store.acquire_page("cohort", "bob", 2) == 0
+    assert not store.renew_lease("cohort", "alice", 0)
+    assert store.renew_lease("cohort", "bob", 0)
+
+
+def test_cohort_layout_is_fixed_by_first_reviewer(store):
+    assert store.register_cohort("cohort", 15, 100, "abc") == (15, 100, "abc")
+    assert store.register_cohort("cohort", 30, 120, "def") == (15, 100, "abc")
+    assert store.register_cohort("other", 30, 120, "def") == (30, 120, "def")
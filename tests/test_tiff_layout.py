@@ -0,0 +1,117 @@
+import io
+import struct
+
+import pytest
+
+from tiff_layout import (
+    IMAGE_LENGTH,
+    IMAGE_WIDTH,
+    NEW_SUBFILE_TYPE,
+    ROWS_PER_STRIP,
+    STRIP_BYTE_COUNTS,
+    STRIP_OFFSETS,
+    TILE_BYTE_COUNTS,
+    TILE_LENGTH,
+    TILE_OFFSETS,
+    TILE_WIDTH,
+    TiffLayoutError,
+    read_tiff_layout,
+)
+
+SHORT, LONG = 3, 4
+
+
+def make_tiff(images):
+    """Little-endian classic TIFF with one IFD per image.
+
+    images are dicts with width, height, and either tile (size) or rows_per_strip,
+    plus an optional subfile_type. Every tile or strip holds 16 bytes of data.
+    """
+    out = bytearray(b"II*\x00\x00\x00\x00\x00")
+    previous_pointer = 4
+    for image in images:
+        if "tile" in image:
+            blocks = -(-image["width"] // image["tile"]) * -(-image["height"] // image["tile"])
+        else:
+            blocks = -(-image["height"] // image["rows_per_strip"])
+        data_start = len(out)
+        out += bytes(16 * blocks)
+        offsets = [data_start + 16 * i for i in range(blocks)]
+        counts = [16] * blocks
+
+        arrays_start = len(out)
+        out += struct.pack(f"<{blocks}I", *offsets) + struct.pack(f"<{blocks}I", *counts)
+
+        def array_entry(tag, values, start):
+            if len(values) == 1:
+                return (tag, LONG, 1, values[0])
+            return (tag, LONG, len(values), start)
+
+        entries = [(IMAGE_WIDTH, LONG, 1, image["width"]), (IMAGE_LENGTH, LONG, 1, image["height"])]
+        if image.get("subfile_type"):
+            entries.append((NEW_SUBFILE_TYPE, LONG, 1, image["subfile_type"]))
+        if "tile" in image:
+            entries += [
+                (TILE_WIDTH, SHORT, 1, image["tile"]),
+                (TILE_LENGTH, SHORT, 1, image["tile"]),
+                array_entry(TILE_OFFSETS, offsets, arrays_start),
+                array_entry(TILE_BYTE_COUNTS, counts, arrays_start + 4 * blocks),
+            ]
+        else:
+            entries += [
+                array_entry(STRIP_OFFSETS, offsets, arrays_start),
+                (ROWS_PER_STRIP, LONG, 1, image["rows_per_strip"]),
+                array_entry(STRIP_BYTE_COUNTS, counts, arrays_start + 4 * blocks),
+            ]
+        entries.sort()
+
+        ifd_offset = len(out)
+        struct.pack_into("<I", out, previous_pointer, ifd_offset)
+        out += struct.pack("<H", len(entries))
+        for tag, field_type, count, value in entries:
+            value_field = struct.pack("<H2x", value) if field_type == SHORT else struct.pack("<I", value)
+            out += struct.pack("<HHI", tag, field_type, count) + value_field
+        previous_pointer = len(out)
+        out += b"\x00\x00\x00\x00"
+    return bytes(out)
+
+
+def test_reads_pyramid_levels():
+    data = make_tiff([
+        {"width": 1000, "height": 600, "tile": 256},
+        {"width": 100, "height": 60, "rows_per_strip": 60, "subfile_type": 1},  # Thumbnail
+        {"width": 500, "height": 300, "tile": 256, "subfile_type": 1},
+    ])
+    layout = read_tiff_layout(io.BytesIO(data))
+
+    assert not layout.bigtiff
+    assert layout.file_size == len(data)
+    assert [ifd.width for ifd in layout.ifds] == [1000, 100, 500]
+    assert [ifd.width for ifd in layout.levels] == [1000, 500]  # The stripped thumbnail is not a level
+    full = layout.ifds[0]
+    assert full.is_tiled
+    assert full.expected_blocks == len(full.data_offsets) == 12
+    assert all(end - start == 16 for start, end in full.data_spans)
+    assert not layout.ifds[1].is_tiled
+    assert layout.ifds[1].expected_blocks == 1
+    assert layout.header_spans[0] == (0, 8)
+    assert (full.offset, full.end) in layout.header_spans
+
+
+def test_rejects_files_that_are_not_tiff():
+    with pytest.raises(TiffLayoutError, match="Not a TIFF"):
+        read_tiff_layout(io.BytesIO(b"\x89PNG\r\n\x1a\n" + bytes(16)))
+
+
+def test_rejects_truncated_files():
+    data = make_tiff([{"width": 512, "height": 512, "tile": 256}])
+    with pytest.raises(TiffLayoutError):
+        read_tiff_layout(io.BytesIO(data[:-10]))
+
+
+def test_rejects_ifd_loops():
+    data = bytearray(make_tiff([{"width": 256, "height": 256, "tile": 256}]))
+    first_ifd = struct.unpack_from("<I", data, 4)[0]
+    struct.pack_into("<I", data, len(data) - 4, first_ifd)  # Next-IFD pointer back to the first IFD
+    with pytest.raises(TiffLayoutError, match="loops"):
+        read_tiff_layout(io.BytesIO(bytes(data)))
@@ -0,0 +1,94 @@
+import struct
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import validation
+from test_tiff_layout import make_tiff
+from validation import ValidationCache, validate_image, validate_images
+
+PYRAMID = [
+    {"width": 1000, "height": 600, "tile": 256},
+    {"width": 100, "height": 60, "rows_per_strip": 60, "subfile_type": 1},  # Thumbnail
+    {"width": 500, "height": 300, "tile": 256, "subfile_type": 1},
+]
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_valid_pyramid(tmp_path):
+    path = write(tmp_path, "good.tif", make_tiff(PYRAMID))
+    result = validate_image(path, min_levels=2)
+    assert result["problems"] == []
+    assert result["levels"] == 2
+    assert result["size"] == (tmp_path / "good.tif").stat().st_size
+
+
+def test_truncated_header(tmp_path):
+    data = make_tiff([{"width": 512, "height": 512, "tile": 256}])
+    path = write(tmp_path, "trunc.tif", data[:-10])  # The IFD comes last
+    problems = validate_image(path)["problems"]
+    assert len(problems) == 1
+    assert problems[0].startswith("Unreadable TIFF header: Read of")
+
+
+def test_tiles_past_end_of_file(tmp_path):
+    data = bytearray(make_tiff([{"width": 512, "height": 512, "tile": 256}]))
+    # Four 16-byte tiles after the header, then their offsets, then their byte counts
+    struct.pack_into("<I", data, 8 + 4 * 16 + 4 * 4 + 3 * 4, 10 ** 6)
+    path = write(tmp_path, "cut.tif", bytes(data))
+    assert validate_image(path)["problems"] == ["IFD 0: 1 tiles/strips extend past end of file (truncated?)"]
+
+
+def test_not_a_tiff(tmp_path):
+    path = write(tmp_path, "junk.tif", b"\x89PNG\r\n\x1a\n" + bytes(16))
+    result = validate_image(path)
+    assert (result["levels"], result["problems"]) == (0, ["Unreadable TIFF header: Not a TIFF file"])
+
+
+def test_missing_file(tmp_path):
+    result = validate_image(str(tmp_path / "missing.tif"))
+    assert result["problems"][0].startswith("Cannot open file")
+    assert result["size"] is None
+
+
+def test_stripped_tiff_has_one_level(tmp_path):
+    path = write(tmp_path, "strip.tif", make_tiff([{"width": 100, "height": 64, "rows_per_strip": 16}]))
+    result = validate_image(path, min_levels=1)
+    assert (result["levels"], result["problems"]) == (1, [])
+    assert validate_image(path, min_levels=3)["problems"] == ["1 pyramid levels, expected at least 3"]
+
+
+def test_levels_must_shrink(tmp_path):
+    path = write(tmp_path, "grow.tif", make_tiff([
+        {"width": 500, "height": 300, "tile": 256},
+        {"width": 1000, "height": 600, "tile": 256, "subfile_type": 1},
+    ]))
+    problems = validate_image(path)["problems"]
+    assert problems == ["Pyramid level 1000x600 is larger than the level before it (500x300)"]
+
+
+def test_validate_images_in_workers_uses_cache(tmp_path):
+    paths = [write(tmp_path, f"s{i}.tif", make_tiff(PYRAMID)) for i in range(3)]
+    paths.append(write(tmp_path, "junk.tif", b"junk"))
+    cache = ValidationCache(str(tmp_path / "validation.sqlite"))
+    calls = []
+
+    results = validate_images(paths, cache, min_levels=2, max_workers=2, progress=lambda *args: calls.append(args))
+    assert sorted(results) == sorted(paths)
+    assert [path for path, result in results.items() if result["problems"]] == [paths[-1]]
+    assert calls[0] == (0, 4) and calls[-1] == (4, 4)
+
+    # Cached results are returned without starting the workers again
+    assert validate_images(paths, cache, min_levels=2, max_workers=2) == results
+
+
+def test_validate_images_reports_broken_workers(tmp_path, monkeypatch):
+    path = write(tmp_path, "good.tif", make_tiff(PYRAMID))
+    monkeypatch.setattr(validation.sys, "executable", "/bin/false")
+    with pytest.raises(BrokenProcessPool):
+        validate_images([path])
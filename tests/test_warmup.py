@@ -0,0 +1,70 @@
+from tiff_layout import Ifd, TiffLayout
+from warmup import MAX_WARM_BYTES_PER_FILE, WARM_BLOCK_SIZE, RangeCache, plan_warm_spans
+
+
+def test_range_cache_serves_ranges_inside_a_segment():
+    cache = RangeCache(1024)
+    cache.put("a.tif", 1, [(100, b"x" * 50), (0, b"h" * 20)])
+    assert ("a.tif", 1) in cache
+    assert cache.size == 70
+    assert cache.get("a.tif", 1, 110, 120) == b"x" * 10
+    assert cache.get("a.tif", 1, 0, 8) == b"h" * 8
+    assert cache.get("a.tif", 1, 15, 105) is None  # Spans two segments
+    assert cache.get("a.tif", 2, 0, 8) is None  # File changed since it was cached
+
+
+def test_range_cache_evicts_least_recently_used():
+    cache = RangeCache(100)
+    cache.put("a.tif", 1, [(0, bytes(40))])
+    cache.put("b.tif", 1, [(0, bytes(40))])
+    cache.get("a.tif", 1, 0, 1)
+    cache.put("c.tif", 1, [(0, bytes(40))])
+    assert ("a.tif", 1) in cache
+    assert ("b.tif", 1) not in cache
+    assert cache.size == 80
+
+    cache.put("d.tif", 1, [(0, bytes(200))])  # Larger than the whole budget
+    assert ("d.tif", 1) not in cache
+
+
+def make_layout(levels, file_size, tiled=True):
+    ifds = []
+    offset = 8
+    for width, tile_spans in levels:
+        tile_size = 256 if tiled else 0
+        ifds.append(Ifd(
+            offset=offset, end=offset + 100, width=width, height=width, tile_width=tile_size, tile_height=tile_size,
+            data_offsets=[start for start, _ in tile_spans],
+            data_byte_counts=[end - start for start, end in tile_spans],
+        ))
+        offset += 100
+    return TiffLayout(byte_order="<", bigtiff=False, file_size=file_size, ifds=ifds)
+
+
+def test_plan_warms_header_and_lowest_level():
+    block = WARM_BLOCK_SIZE
+    layout = make_layout([
+        (4096, [(10 * block, 20 * block)]),
+        (256, [(30 * block + 10, 30 * block + 20)]),
+    ], file_size=40 * block)
+    # The header block and the block of the smallest level, not the full-resolution tiles
+    assert plan_warm_spans(layout) == [[0, block], [30 * block, 31 * block]]
+
+
+def test_plan_skips_stripped_label_images():
+    block = WARM_BLOCK_SIZE
+    layout = make_layout([
+        (4096, [(10 * block, 20 * block)]),
+        (256, [(30 * block, 30 * block + 20)]),
+    ], file_size=40 * block)
+    label = make_layout([(64, [(35 * block, 35 * block + 20)])], file_size=40 * block, tiled=False).ifds[0]
+    label.offset, label.end = 300, 400
+    layout.ifds.append(label)
+    assert plan_warm_spans(layout) == [[0, block], [30 * block, 31 * block]]
+
+
+def test_plan_stops_at_per_file_budget():
+    block = WARM_BLOCK_SIZE
+    huge = MAX_WARM_BYTES_PER_FILE + block
+    layout = make_layout([(256, [(block, block + huge)])], file_size=2 * block + huge)
+    assert plan_warm_spans(layout) == [[0, block]]
@@ -0,0 +1,200 @@
+"""
+Header-only TIFF/BigTIFF layout reader used for warming, validation and load testing
+"""
+import struct
+from dataclasses import dataclass, field
+
+# Tags needed to locate image data
+NEW_SUBFILE_TYPE = 254
+IMAGE_WIDTH = 256
+IMAGE_LENGTH = 257
+COMPRESSION = 259
+STRIP_OFFSETS = 273
+ROWS_PER_STRIP = 278
+STRIP_BYTE_COUNTS = 279
+TILE_WIDTH = 322
+TILE_LENGTH = 323
+TILE_OFFSETS = 324
+TILE_BYTE_COUNTS = 325
+
+_DECODED_TAGS = {
+    NEW_SUBFILE_TYPE, IMAGE_WIDTH, IMAGE_LENGTH, COMPRESSION, STRIP_OFFSETS, ROWS_PER_STRIP,
+    STRIP_BYTE_COUNTS, TILE_WIDTH, TILE_LENGTH, TILE_OFFSETS, TILE_BYTE_COUNTS,
+}
+
+# TIFF field type -> (struct format character, size in bytes)
+_FIELD_TYPES = {
+    1: ('B', 1), 2: ('B', 1), 3: ('H', 2), 4: ('I', 4), 5: ('II', 8), 6: ('b', 1), 7: ('B', 1),
+    8: ('h', 2), 9: ('i', 4), 10: ('ii', 8), 11: ('f', 4), 12: ('d', 8), 13: ('I', 4),
+    16: ('Q', 8), 17: ('q', 8), 18: ('Q', 8),
+}
+
+MAX_IFDS = 256  # Guards against IFD chains that loop back on themselves
+
+
+class TiffLayoutError(ValueError):
+    """Raised when a file is not a readable TIFF"""
+
+
+@dataclass
+class Ifd:
+    """One image file directory (a pyramid level, label, macro image, ...)"""
+    offset: int
+    end: int  # End of the directory entries and next-IFD pointer
+    width: int = 0
+    height: int = 0
+    compression: int = 1
+    subfile_type: int = 0
+    tile_width: int = 0
+    tile_height: int = 0
+    rows_per_strip: int = 0
+    data_offsets: list = field(default_factory=list)  # Tile or strip offsets
+    data_byte_counts: list = field(default_factory=list)
+    value_spans: list = field(default_factory=list)  # (start, end) of tag values stored outside the IFD
+
+    @property
+    def is_tiled(self):
+        return self.tile_width > 0 and self.tile_height > 0
+
+    @property
+    def expected_blocks(self):
+        """Number of tiles or strips the image dimensions call for"""
+        if self.is_tiled:
+            return -(-self.width // self.tile_width) * -(-self.height // self.tile_height)
+        rows_per_strip = self.rows_per_strip or self.height
+        return -(-self.height // rows_per_strip) if rows_per_strip else 0
+
+    @property
+    def data_spans(self):
+        """(start, end) byte span of each tile or strip"""
+        return [(o, o + c) for o, c in zip(self.data_offsets, self.data_byte_counts)]
+
+
+@dataclass
+class TiffLayout:
+    """IFD chain of a TIFF file as found on disk"""
+    byte_order: str
+    bigtiff: bool
+    file_size: int
+    ifds: list
+
+    @property
+    def header_spans(self):
+        """Byte spans a reader needs before it can fetch any pixel data"""
+        spans = [(0, 16 if self.bigtiff else 8)]
+        for ifd in self.ifds:
+            spans.append((ifd.offset, ifd.end))
+            spans.extend(ifd.value_spans)
+        return spans
+
+    @property
+    def levels(self):
+        """Tiled pyramid levels, largest first; stripped IFDs are labels, macros and thumbnails"""
+        levels = [ifd for ifd in self.ifds if ifd.is_tiled and not ifd.subfile_type & 0b100]  # Skip masks
+        return sorted(levels, key=lambda ifd: ifd.width * ifd.height, reverse=True)
+
+
+def read_tiff_layout(f, file_size=None):
+    """Read the IFD chain of an open binary file without touching pixel data"""
+    if file_size is None:
+        f.seek(0, 2)
+        file_size = f.tell()
+
+    def read_at(offset, size):
+        if offset < 0 or offset + size > file_size:
+            raise TiffLayoutError(f"Read of {size} bytes at {offset} is beyond end of file ({file_size})")
+        f.seek(offset)
+        data = f.read(size)
+        if len(data) != size:
+            raise TiffLayoutError(f"Short read at {offset}")
+        return data
+
+    header = read_at(0, 8)
+    if header[:2] == b'II':
+        byte_order = '<'
+    elif header[:2] == b'MM':
+        byte_order = '>'
+    else:
+        raise TiffLayoutError("Not a TIFF file")
+
+    magic = struct.unpack(byte_order + 'H', header[2:4])[0]
+    if magic == 42:
+        bigtiff = False
+        next_offset = struct.unpack(byte_order + 'I', header[4:8])[0]
+        count_format, entry_size, offset_format, inline_size = 'H', 12, 'I', 4
+    elif magic == 43:
+        bigtiff = True
+        next_offset = struct.unpack(byte_order + 'Q', read_at(8, 8))[0]
+        count_format, entry_size, offset_format, inline_size = 'Q', 20, 'Q', 8
+    else:
+        raise TiffLayoutError(f"Unknown TIFF version {magic}")
+
+    count_size = struct.calcsize(count_format)
+    offset_size = struct.calcsize(offset_format)
+    ifds = []
+    seen = set()
+
+    while next_offset:
+        if next_offset in seen:
+            raise TiffLayoutError(f"IFD chain loops back to offset {next_offset}")
+        if len(ifds) >= MAX_IFDS:
+            raise TiffLayoutError(f"More than {MAX_IFDS} IFDs")
+        seen.add(next_offset)
+
+        entry_count = struct.unpack(byte_order + count_format, read_at(next_offset, count_size))[0]
+        entries_start = next_offset + count_size
+        entries = read_at(entries_start, entry_count * entry_size + offset_size)
+        ifd = Ifd(offset=next_offset, end=entries_start + len(entries))
+
+        for i in range(entry_count):
+            entry = entries[i * entry_size:(i + 1) * entry_size]
+            tag, field_type = struct.unpack(byte_order + 'HH', entry[:4])
+            count = struct.unpack(byte_order + offset_format, entry[4:4 + offset_size])[0]
+            value_field = entry[4 + offset_size:]
+            if field_type not in _FIELD_TYPES:
+                continue  # Unknown types may be skipped per the specification
+
+            value_format, value_size = _FIELD_TYPES[field_type]
+            total_size = value_size * count
+            if total_size > inline_size:
+                value_offset = struct.unpack(byte_order + offset_format, value_field)[0]
+                ifd.value_spans.append((value_offset, value_offset + total_size))
+                if tag not in _DECODED_TAGS:
+                    continue
+                raw = read_at(value_offset, total_size)
+            else:
+                if tag not in _DECODED_TAGS:
+                    continue
+                raw = value_field[:total_size]
+
+            values = list(struct.unpack(byte_order + value_format[0] * count * len(value_format), raw))
+            _set_tag(ifd, tag, values)
+
+        ifds.append(ifd)
+        next_offset = struct.unpack(byte_order + offset_format, entries[-offset_size:])[0]
+
+    if not ifds:
+        raise TiffLayoutError("TIFF file has no images")
+    return TiffLayout(byte_order=byte_order, bigtiff=bigtiff, file_size=file_size, ifds=ifds)
+
+
+def _set_tag(ifd, tag, values):
+    """Store a decoded tag value on the IFD"""
+    if tag == IMAGE_WIDTH:
+        ifd.width = values[0]
+    elif tag == IMAGE_LENGTH:
+        ifd.height = values[0]
+    elif tag == COMPRESSION:
+        ifd.compression = values[0]
+    elif tag == NEW_SUBFILE_TYPE:
+        ifd.subfile_type = values[0]
+    elif tag == TILE_WIDTH:
+        ifd.tile_width = values[0]
+    elif tag == TILE_LENGTH:
+        ifd.tile_height = values[0]
+    elif tag == ROWS_PER_STRIP:
+        ifd.rows_per_strip = values[0]
+    elif tag in (TILE_OFFSETS, STRIP_OFFSETS):
+        ifd.data_offsets = values
+    elif tag in (TILE_BYTE_COUNTS, STRIP_BYTE_COUNTS):
+        ifd.data_byte_counts = values
@@ -0,0 +1,40 @@
+"""
+Keyboard-driven single-image triage component with look-ahead prefetch
+"""
+from pathlib import Path
+import streamlit.components.v1 as components
+
+_FRONTEND_DIR = Path(__file__).parent / "frontend" / "triage"
+_triage_view = components.declare_component("triage_view", path=str(_FRONTEND_DIR))
+
+
+def triage_view(items, exclusion_reasons, position, first, last, window_start, window_end, reset_key, list_key,
+                acknowledged=None, prefetch=5, viewer_height=600, debounce_ms=400, key=None):
+    """Render the triage view and return the latest batch of changes.
+
+    items covers the image ids window_start..window_end and uses the same card
+    dicts as the review grid. Reviewers move between first and last with the
+    keyboard, hotkeys 1-9 exclude with the matching reason and advance, 0
+    includes. The returned value holds changes, the current position and the
+    measured images per minute, tagged with reset_key and the list_key of the
+    image list. Position is taken from Python only when reset_key changes.
+    Changes are sent again with every batch until acknowledged, the
+    (session, batch) Python applied last, covers them.
+    """
+    return _triage_view(
+        items=items,
+        reasons=exclusion_reasons,
+        position=position,
+        first=first,
+        last=last,
+        window_start=window_start,
+        window_end=window_end,
+        reset_key=reset_key,
+        list_key=list_key,
+        acknowledged=acknowledged,
+        prefetch=prefetch,
+        viewer_height=viewer_height,
+        debounce_ms=debounce_ms,
+        key=key,
+        default=None,
+    )
@@ -0,0 +1,183 @@
+"""
+Parallel header-only integrity and pyramid-structure checks for TIFF slides
+"""
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from archive_index import open_image, resolve_image
+from tiff_layout import read_tiff_layout, TiffLayoutError
+
+TIFF_EXTENSIONS = ('.tif', '.tiff', '.TIF', '.TIFF')
+VALIDATION_CHUNK_SIZE = 16  # Paths handed to a worker process at a time
+
+
+def validate_image(path, min_levels=1):
+    """Check a slide's IFD chain, data bounds and pyramid structure from its headers.
+
+    Returns a JSON-compatible dict with the path, size, mtime, level count and a
+    list of problems; the image is valid when that list is empty.
+    """
+    result = {"path": path, "size": None, "mtime_ns": None, "levels": 0, "problems": []}
+    problems = result["problems"]
+    try:
+        _, _, size, mtime_ns = resolve_image(path)
+    except OSError as e:
+        problems.append(f"Cannot open file: {e}")
+        return result
+    result["size"] = size
+    result["mtime_ns"] = mtime_ns
+
+    if not path.endswith(TIFF_EXTENSIONS):
+        result["levels"] = 1
+        return result  # Only TIFF structure is checked
+
+    try:
+        with open_image(path) as f:
+            layout = read_tiff_layout(f, size)
+    except (OSError, TiffLayoutError) as e:
+        problems.append(f"Unreadable TIFF header: {e}")
+        return result
+
+    for number, ifd in enumerate(layout.ifds):
+        label = f"IFD {number}"
+        if ifd.width <= 0 or ifd.height <= 0:
+            problems.append(f"{label}: missing image dimensions")
+            continue
+        for start, end in ifd.value_spans:
+            if end > size:
+                problems.append(f"{label}: tag data at {start} runs past end of file")
+                break
+        if len(ifd.data_offsets) != len(ifd.data_byte_counts):
+            problems.append(f"{label}: {len(ifd.data_offsets)} offsets but {len(ifd.data_byte_counts)} byte counts")
+        if len(ifd.data_offsets) != ifd.expected_blocks:
+            problems.append(f"{label}: {len(ifd.data_offsets)} tiles/strips, expected {ifd.expected_blocks}")
+        # Empty tiles (offset and count 0) are allowed, anything else must lie inside the file
+        truncated = sum(1 for start, end in ifd.data_spans if end > start and end > size)
+        if truncated:
+            problems.append(f"{label}: {truncated} tiles/strips extend past end of file (truncated?)")
+
+    # Pyramid levels are the tiled IFDs; stripped IFDs are labels, macros and thumbnails,
+    # except in a plain stripped TIFF, whose full-resolution first IFD is its only level
+    levels = [ifd for ifd in layout.ifds if ifd.is_tiled and not ifd.subfile_type & 0b100]
+    if not levels and layout.ifds and not layout.ifds[0].subfile_type & 0b100:
+        levels = layout.ifds[:1]
+    result["levels"] = len(levels)
+    if len(levels) < min_levels:
+        problems.append(f"{len(levels)} pyramid levels, expected at least {min_levels}")
+    for previous, level in zip(levels, levels[1:]):
+        if level.width > previous.width or level.height > previous.height:
+            problems.append(
+                f"Pyramid level {level.width}x{level.height} is larger than the level before it "
+                f"({previous.width}x{previous.height})"
+            )
+            break
+
+    return result
+
+
+class ValidationCache:
+    """Validation results keyed by path, reused while a file's size and mtime are unchanged"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS validation ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, min_levels INTEGER, result TEXT)"
+        )
+
+    def _connection(self):
+        """Return the SQLite connection of the current thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, path, size, mtime_ns, min_levels):
+        row = self._connection().execute(
+            "SELECT result FROM validation WHERE path = ? AND size = ? AND mtime_ns = ? AND min_levels = ?",
+            (path, size, mtime_ns, min_levels),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_many(self, results, min_levels):
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO validation (path, size, mtime_ns, min_levels, result) VALUES (?, ?, ?, ?, ?)",
+                [(r["path"], r["size"], r["mtime_ns"], min_levels, json.dumps(r)) for r in results],
+            )
+
+
+def _validate_chunk(paths, min_levels):
+    return [validate_image(path, min_levels) for path in paths]
+
+
+def _run_workers(min_levels, max_workers):
+    """Worker entry point: validate the JSON path list on stdin, writing one JSON result list per chunk"""
+    paths = json.load(sys.stdin)
+    chunks = [paths[i:i + VALIDATION_CHUNK_SIZE] for i in range(0, len(paths), VALIDATION_CHUNK_SIZE)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for chunk_results in executor.map(_validate_chunk, chunks, [min_levels] * len(chunks)):
+            sys.stdout.write(json.dumps(chunk_results) + "\n")
+            sys.stdout.flush()
+
+
+def validate_images(paths, cache=None, min_levels=1, max_workers=None, progress=None):
+    """Validate many slides in worker processes, skipping files with a cached result.
+
+    progress is an optional callable receiving (done, total). Returns {path: result}.
+    Raises BrokenProcessPool when the workers die and OSError when they cannot be started.
+    """
+    results = {}
+    pending = []
+    for path in paths:
+        cached = None
+        if cache is not None:
+            try:
+                _, _, size, mtime_ns = resolve_image(path)
+                cached = cache.get(path, size, mtime_ns, min_levels)
+            except OSError:
+                pass
+        if cached is not None:
+            results[path] = cached
+        else:
+            pending.append(path)
+
+    total = len(results) + len(pending)
+    if progress is not None:
+        progress(len(results), total)
+
+    if pending:
+        chunk_count = -(-len(pending) // VALIDATION_CHUNK_SIZE)
+        workers = max_workers or min(chunk_count, os.cpu_count() or 1)
+        # The pool runs in a separate interpreter started from this file: pool workers spawned from
+        # the Streamlit process would re-import the running script as their __main__, and forking
+        # the threaded server can copy held locks into them
+        command = [sys.executable, os.path.abspath(__file__), str(min_levels), str(workers)]
+        with subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True) as worker:
+            json.dump(pending, worker.stdin)
+            worker.stdin.close()
+            for line in worker.stdout:
+                chunk_results = json.loads(line)
+                for result in chunk_results:
+                    results[result["path"]] = result
+                if cache is not None:
+                    cache.put_many([r for r in chunk_results if r["mtime_ns"] is not None], min_levels)
+                if progress is not None:
+                    progress(len(results), total)
+        if worker.returncode != 0:
+            raise BrokenProcessPool(f"Validation workers exited with status {worker.returncode}")
+
+    return results
+
+
+if __name__ == "__main__":
+    _run_workers(int(sys.argv[1]), int(sys.argv[2]))
@@ -0,0 +1,151 @@
+"""
+Background warming of slides a viewer is about to open
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from tiff_layout import read_tiff_layout, TiffLayoutError
+from archive_index import resolve_image, open_image
+
+WARM_BLOCK_SIZE = 64 * 1024  # geotiff.js reads files in 64 KiB blocks
+DEFAULT_WARM_CACHE_MB = 256
+MAX_WARM_BYTES_PER_FILE = 8 * 1024 * 1024  # Header plus lowest pyramid level, per slide
+WARM_WORKERS = 4
+
+
+class RangeCache:
+    """LRU cache of file byte ranges, bounded by a memory budget"""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.size = 0
+        self._files = OrderedDict()  # (path, mtime_ns) -> sorted [(start, data)]
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._files
+
+    def get(self, path, mtime_ns, start, end):
+        """Return bytes [start, end) if they are cached in one piece, else None"""
+        key = (path, mtime_ns)
+        with self._lock:
+            segments = self._files.get(key)
+            if segments is None:
+                return None
+            self._files.move_to_end(key)
+            for segment_start, data in segments:
+                if segment_start <= start and end <= segment_start + len(data):
+                    return data[start - segment_start:end - segment_start]
+                if segment_start > start:
+                    break
+        return None
+
+    def put(self, path, mtime_ns, segments):
+        """Cache a file's [(start, data)] segments, replacing what was cached for it"""
+        key = (path, mtime_ns)
+        segments = sorted(segments, key=lambda segment: segment[0])
+        added = sum(len(data) for _, data in segments)
+        if added > self.budget_bytes:
+            return
+
+        with self._lock:
+            old = self._files.pop(key, None)
+            if old is not None:
+                self.size -= sum(len(data) for _, data in old)
+            # Evict least recently used files until the new segments fit
+            while self._files and self.size + added > self.budget_bytes:
+                _, evicted = self._files.popitem(last=False)
+                self.size -= sum(len(data) for _, data in evicted)
+            self._files[key] = segments
+            self.size += added
+
+
+def _advise_willneed(fd, offset, length):
+    """Hint the kernel to start reading a range ahead of time, where supported"""
+    fadvise = getattr(os, "posix_fadvise", None)
+    if fadvise is not None:
+        try:
+            fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+
+
+def _aligned_blocks(spans, file_size):
+    """Merge spans after widening them to block boundaries, in file order"""
+    blocks = []
+    for start, end in sorted(spans):
+        start = start - start % WARM_BLOCK_SIZE
+        end = min(file_size, -(-end // WARM_BLOCK_SIZE) * WARM_BLOCK_SIZE)
+        if blocks and start <= blocks[-1][1]:
+            blocks[-1][1] = max(blocks[-1][1], end)
+        elif start < end:
+            blocks.append([start, end])
+    return blocks
+
+
+def plan_warm_spans(layout):
+    """Spans to warm for a slide: the header and IFDs first, then the lowest pyramid level"""
+    spans = [_aligned_blocks(layout.header_spans, layout.file_size)]
+    levels = layout.levels
+    if levels and levels[-1].data_spans:
+        spans.append(_aligned_blocks(levels[-1].data_spans, layout.file_size))
+
+    planned = []
+    total = 0
+    for group in spans:
+        for start, end in group:
+            if total + end - start > MAX_WARM_BYTES_PER_FILE:
+                return _aligned_blocks(planned, layout.file_size)
+            planned.append((start, end))
+            total += end - start
+    return _aligned_blocks(planned, layout.file_size)
+
+
+class SlideWarmer:
+    """Warms slides in a thread pool so their first viewer requests hit memory"""
+
+    def __init__(self, cache, max_workers=WARM_WORKERS):
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="warmup")
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def warm(self, paths):
+        """Queue slides for warming and return how many were queued"""
+        queued = 0
+        for path in paths:
+            with self._lock:
+                if path in self._in_flight:
+                    continue
+                self._in_flight.add(path)
+            self._executor.submit(self._warm_file, path)
+            queued += 1
+        return queued
+
+    def _warm_file(self, path):
+        try:
+            # Archive members are warmed at their offset inside the archive
+            file_path, base_offset, size, mtime_ns = resolve_image(path)
+            if (path, mtime_ns) in self.cache:
+                return
+            with open(file_path, 'rb') as raw, open_image(path) as f:
+                fd = raw.fileno()
+                _advise_willneed(fd, base_offset, WARM_BLOCK_SIZE)
+                layout = read_tiff_layout(f, size)
+                spans = plan_warm_spans(layout)
+                # Let the kernel fetch every span in parallel before reading them in order
+                for start, end in spans:
+                    _advise_willneed(fd, base_offset + start, end - start)
+                segments = []
+                for start, end in spans:
+                    f.seek(start)
+                    segments.append((start, f.read(end - start)))
+            self.cache.put(path, mtime_ns, segments)
+        except (OSError, TiffLayoutError) as e:
+            print(f"Could not warm {path}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(path)